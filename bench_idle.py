@@ -0,0 +1,42 @@
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+
+from tctg.tctg import TCTG
+from tools.config import LoaderConfig
+
+CONFIG = "config.yaml"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="idle wake-ups, visible or hidden")
+    parser.add_argument("--seconds", type=float, default=60, help="per state")
+    args = parser.parse_args()
+
+    # no update, prewarm nor saved config
+    config = LoaderConfig(CONFIG)
+    config.update_at_start = False
+    config.prewarm.before_seconds = 0
+    config.profiling.enabled = False
+    config.control.port = 0
+    config.control.token = "bench"
+    folder = tempfile.TemporaryDirectory()
+    config.infos_file = os.path.join(folder.name, "infos.yaml")
+
+    events = Counter()
+    tctg = TCTG(config, lambda key, value=None: events.update((key.name,)))
+    for visible in (True, False):
+        tctg.visible = visible
+        events.clear()
+        wakeups = tctg.schedule.wakeups
+        time.sleep(args.seconds)
+        per_minute = 60 / args.seconds
+        wakeups = (tctg.schedule.wakeups - wakeups) * per_minute
+        print(
+            f"{'visible' if visible else 'hidden'}: "
+            f"{wakeups:.0f} schedule wake-ups/min, "
+            f"{sum(events.values()) * per_minute:.0f} UI events/min {dict(events)}"
+        )
+    tctg.stop()
+    folder.cleanup()
@@ -0,0 +1,47 @@
+import argparse
+import time
+from collections import Counter
+from datetime import datetime
+
+from tctg.infos import InfosHandler
+from tctg.site import SiteProfile
+from tools.archive import Archive
+from tools.config import LoaderConfig
+
+CONFIG = "config.yaml"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="parse the archived pages")
+    parser.add_argument("--page", default="attendance", help="site profile page")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--errors", action="store_true", help="only error pages")
+    args = parser.parse_args()
+
+    config = LoaderConfig(CONFIG)
+    site = SiteProfile(config.site)
+    archive = Archive(**vars(config.archive))
+
+    entries = archive.find(
+        since=args.since, url=site.pages[args.page], error=True if args.errors else None
+    )
+    results, duration = Counter(), 0
+    for entry in entries:
+        if not entry["page"]:
+            continue
+        page = archive.load(entry["page"])
+        start = time.perf_counter()
+        try:
+            fields = site.extract(page)
+            missing = set(InfosHandler.required_fields) - set(fields)
+            results["missing fields" if missing else "ok"] += 1
+        # pylint: disable=broad-except
+        except Exception as err:
+            results[type(err).__name__] += 1
+        duration += time.perf_counter() - start
+
+    if n_pages := sum(results.values()):
+        print(f"{n_pages} pages parsed in {duration * 1000 / n_pages:.2f}ms each")
+        for result, n in results.most_common():
+            print(f"{result}: {n}")
+    else:
+        print("no archived page")
@@ -0,0 +1,132 @@
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from functools import partial
+
+from tctg.bonus import SECONDS_A_DAY, SECONDS_A_HOUR, Bonuses
+from tctg.simulator import Simulator
+from tools.loader import Loader
+
+CONFIG = "config.yaml"
+
+
+def previous_speed(bonuses, config):
+    """
+    the estimator before the least squares fit: the seeding pts over the
+    time since the last event that breaks the speed, cropped there
+    """
+    start = 0
+    for i in range(len(bonuses) - 1, 0, -1):
+        begin, end = bonuses[i - 1], bonuses[i]
+        cross_days = (end.date.date() - begin.date.date()).days
+        if (
+            (cross_days == 1 and end.dbonus == 0)  # missing bonus
+            or end.bonus < begin.bonus  # consummed bonus
+            or cross_days > 1  # cross more than one day
+        ):
+            start = i
+            break
+    bonuses = bonuses[start:]
+    if len(bonuses) < 2:
+        return None
+    dt = (bonuses[-1].date - bonuses[0].date).total_seconds()
+    bonus = bonuses[-1].bonus - bonuses[0].bonus - sum(b.dbonus for b in bonuses[1:])
+    if dt >= config.bonuses.compute_speed_min_hours * SECONDS_A_HOUR:
+        return bonus * SECONDS_A_DAY / dt
+    return None
+
+
+def _errors(estimates, speed):
+    errors = [estimate - speed for estimate in estimates if estimate is not None]
+    abs_errors = list(map(abs, errors))
+    return (
+        len(errors),
+        statistics.mean(errors),
+        statistics.median(abs_errors),
+        statistics.mean(abs_errors),
+    )
+
+
+def _history(n, speed, rnd, minutes=10):
+    """
+    n samples every few minutes, a daily bonus at the first of each day,
+    no claim: the previous estimator scans it all
+    """
+    bonuses, date, bonus, day = Bonuses(), datetime(2022, 1, 1), 0, None
+    for _ in range(n):
+        dbonus = 100 if date.date() != day else 0
+        bonus += dbonus + speed * rnd.uniform(0.5, 1.5) * minutes * 60 / SECONDS_A_DAY
+        bonuses.add(date=date, bonus=bonus, dbonus=dbonus)
+        date, day = date + timedelta(minutes=minutes), date.date()
+    return bonuses
+
+
+def _timing(estimate, repeat=3):
+    """best of some runs, in ms"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        estimate()
+        durations.append(time.perf_counter() - start)
+    return min(durations) * 1000
+
+
+def timings(sizes, speed, config):
+    rnd = random.Random(0)
+    print("samples: previous, least squares (ms)")
+    for n in sizes:
+        bonuses = _history(n, speed, rnd)
+        previous = _timing(partial(previous_speed, bonuses, config))
+        least_squares = _timing(partial(bonuses.speed, config))
+        print(f"{n:,}: {previous:.1f}, {least_squares:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark the bonus speed")
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--seeds", type=int, default=20)
+    parser.add_argument("--speed", type=float, default=300, help="seeding pts/day")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument(
+        "--timings",
+        type=int,
+        nargs="*",
+        help="times the estimators on histories of these sizes instead",
+    )
+    args = parser.parse_args()
+
+    if args.timings is not None:
+        sizes = args.timings or (10_000, 100_000, 1_000_000)
+        timings(sizes, args.speed, Loader(CONFIG).load())
+        raise SystemExit
+
+    # the estimates after each simulated update
+    estimates = dict(previous=[], least_squares=[])
+    for seed in range(args.seeds):
+        with Simulator.from_file(
+            CONFIG, seed=seed, error_rate=args.error_rate, speed=args.speed
+        ) as simulator:
+            # pylint: disable=protected-access
+            infos, update_end = simulator.infos, simulator.infos._update_end
+
+            def sampled_update_end(
+                infos=infos, update_end=update_end, config=simulator.config
+            ):
+                update_end()
+                bonuses = Bonuses(infos.infos.bonuses)
+                estimates["previous"].append(previous_speed(bonuses, config))
+                speed = bonuses.speed(config)
+                estimates["least_squares"].append(speed and speed.value)
+
+            infos._update_end = sampled_update_end
+            simulator.run(args.days)
+
+    print(f"{args.seeds} x {args.days} days, {args.speed:g} pts/day seeded")
+    for name, values in estimates.items():
+        n, bias, median, mean = _errors(values, args.speed)
+        print(
+            f"{name}: {n}/{len(values)} estimates, bias {bias:+.1f}, "
+            f"abs error median {median:.1f}, mean {mean:.1f} pts/day"
+        )
@@ -0,0 +1,37 @@
+import argparse
+import json
+import sys
+import urllib.error
+import urllib.request
+
+from tools.config import LoaderConfig
+from tools.control import HOST, TOKEN_HEADER
+
+CONFIG = "config.yaml"
+COMMANDS = (
+    "status",
+    "force_update",
+    "pause",
+    "resume",
+    "profiling_on",
+    "profiling_off",
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="query the running instance")
+    parser.add_argument("command", nargs="?", default="status", choices=COMMANDS)
+    parser.add_argument("--timeout", type=float, default=2, help="seconds")
+    args = parser.parse_args()
+
+    control = LoaderConfig(CONFIG).control
+    url = f"http://{HOST}:{control.port}/{args.command}"
+    # a command is a POST
+    data = None if args.command == "status" else b""
+    request = urllib.request.Request(url, data, {TOKEN_HEADER: control.token})
+    try:
+        with urllib.request.urlopen(request, timeout=args.timeout) as response:
+            print(json.dumps(json.load(response), indent=2, ensure_ascii=False))
+    except urllib.error.HTTPError as err:
+        sys.exit(json.load(err).get("error", err))
+    except (urllib.error.URLError, OSError) as err:
+        sys.exit(f"not running ? {err}")
@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+from tctg.history import COLUMNS, History, row
+from tools.config import LoaderConfig
+from tools.export import WRITERS, chunks
+
+CONFIG = "config.yaml"
+
+
+def _account(infos_file):
+    """the folder name of the infos file"""
+    return os.path.basename(os.path.dirname(os.path.abspath(infos_file)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="stream the updates history")
+    parser.add_argument(
+        "infos_files", nargs="*", help="an infos file per account, config's if none"
+    )
+    parser.add_argument("--format", choices=tuple(WRITERS), default="csv")
+    parser.add_argument("--output", help="file, folder for npy")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--account", action="append", help="only those accounts")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="append what's newer than the last export",
+    )
+    parser.add_argument("--chunk", type=int, default=10000, help="rows per write")
+    args = parser.parse_args()
+
+    infos_files = args.infos_files or [LoaderConfig(CONFIG).infos_file]
+    output = args.output or f"history.{args.format}"
+    # last exported date per account
+    state_file = f"{output}.state.json"
+    state = {}
+    if args.incremental and os.path.exists(state_file):
+        with open(state_file, "r", encoding="utf8") as f:
+            state = json.load(f)
+
+    start, n_rows = time.perf_counter(), 0
+    writer = WRITERS[args.format](output, COLUMNS, append=args.incremental)
+    try:
+        for infos_file in infos_files:
+            account = _account(infos_file)
+            if args.account and account not in args.account:
+                continue
+            after = state.get(account)
+            samples = History(infos_file).samples(
+                since=args.since,
+                until=args.until,
+                after=after and datetime.fromisoformat(after),
+            )
+            for chunk in chunks(
+                (row(account, sample) for sample in samples), args.chunk
+            ):
+                writer.write(chunk)
+                writer.flush()
+                # resumable from the last written chunk
+                state[account] = chunk[-1][1].isoformat(timespec="seconds")
+                with open(state_file, "w", encoding="utf8") as f:
+                    json.dump(state, f)
+                n_rows += len(chunk)
+    finally:
+        writer.close()
+
+    duration = time.perf_counter() - start
+    print(f"{n_rows} rows exported to {output} in {duration:.1f}s")
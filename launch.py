@@ -9,12 +9,18 @@ if __name__ == "__main__":
 
     with SingleApp(config.title) as app:
         if app.can_run:
+            from tctg.worker import Worker, chrome_kw, site_url
             from tools import img_to64
             from tools.widgets import Splash
 
+            # Chrome launched while the GUI is built
+            worker = Worker(**vars(config.worker))
+            if config.update_at_start and config.prewarm.at_start:
+                worker.prewarm(config, site_url(config), chrome_kw(config))
+
             with Splash(img_to64(LOGO, height=config.UI.logo_height)):
                 # loooong import
-                from tctg import TCTGWindow
+                from tctg.window import TCTGWindow
 
-                window = TCTGWindow(app, config)
+                window = TCTGWindow(app, config, worker)
             window.loop()
@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import psutil
+
+from tests.server import COOKIE, HttpDriver, SiteServer
+from tools.budget import bucket, key_settings
+from tools.config import LoaderConfig
+
+CONFIG = "config.yaml"
+FOLDER = "loadtest"
+
+
+class Sampler:
+    """peak RSS & Chrome processes count of this process tree"""
+
+    def __init__(self, dt=0.2):
+        self.dt = dt
+        self.peak_rss = 0
+        self.peak_chromes = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._running = False
+        self._thread.join()
+
+    def _sample(self):
+        process = psutil.Process()
+        while self._running:
+            rss, chromes = process.memory_info().rss, 0
+            for child in process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                    chromes += "chrome" in child.name().lower()
+                except psutil.Error:
+                    pass
+            self.peak_rss = max(self.peak_rss, rss)
+            self.peak_chromes = max(self.peak_chromes, chromes)
+            time.sleep(self.dt)
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def chrome_account(server, account, per_minute):
+    """
+    the Worker update with headless Chrome, in its own profile & infos file,
+    no schedule nor control server, the accounts share the request budget
+    """
+    # pylint: disable=import-outside-toplevel
+    from tctg.worker import Worker, chrome_kw
+    from tools.chrome import Chrome
+
+    folder = os.path.join(FOLDER, f"account_{account}")
+    config = LoaderConfig(CONFIG)
+    config.infos_file = os.path.join(folder, "infos.yaml")
+    config.domain = server.domain
+    kw = dict(chrome_kw(config), profile_folder=os.path.join(folder, "profile"))
+    settings = key_settings(config.budget, server.domain)
+    budget = bucket(server.domain, **dict(settings, per_minute=per_minute))
+    worker = Worker(lambda *args: None, **vars(config.worker))
+
+    # login once, the cookie lives in the profile
+    with Chrome(**kw) as driver:
+        driver.get(f"{server.url}/takelogin.php?uid={account}")
+
+    def update():
+        return not worker.update(config, server.url, kw, budget).error
+
+    return update, worker.stop
+
+
+async def cdp_updates(server, n_accounts, n_updates, per_minute, results):
+    """
+    a single headless Chrome, a browser context with its own cookies
+    & a tab per account, all the accounts updated at the same time over CDP
+    """
+    # pylint: disable=import-outside-toplevel
+    from tctg.site import SiteProfile
+    from tools.cdp import CDP, CDPError
+    from tools.chrome import Chrome
+
+    config = LoaderConfig(CONFIG)
+    site = SiteProfile(config.site)
+    settings = key_settings(config.budget, server.domain)
+    budget = bucket(server.domain, **dict(settings, per_minute=per_minute))
+    url = f"{server.url}/{site.pages['attendance']}"
+    timeout = config.timeouts.page_load
+
+    async def account(cdp, uid):
+        tab = await cdp.new_tab(await cdp.new_context())
+        await tab.set_cookie(server.url, COOKIE, str(uid))
+        for _ in range(n_updates):
+            start = time.perf_counter()
+            try:
+                # the bonus & its re-read in place, like the updater
+                await asyncio.to_thread(budget.acquire)
+                await tab.load(url, timeout)
+                fields = site.extract(await tab.html())
+                await asyncio.to_thread(budget.acquire)
+                if page_source := await tab.fetch(url):
+                    fields.update(site.extract(page_source))
+                ok = bool(page_source and fields)
+            except (CDPError, asyncio.TimeoutError):
+                ok = False
+            results.append((time.perf_counter() - start, ok))
+        await tab.close()
+
+    profile_folder = os.path.join(FOLDER, "cdp_profile")
+    with Chrome(profile_folder=profile_folder, **vars(config.chrome)) as driver:
+        async with CDP(driver.debugger_address) as cdp:
+            await asyncio.gather(*(account(cdp, i) for i in range(n_accounts)))
+
+
+def http_account(server, account, per_minute):
+    """
+    browserless baseline, the Updater over plain http in its own infos file,
+    the accounts share the request budget
+    """
+    # pylint: disable=import-outside-toplevel
+    from tctg.updater import Updater
+
+    folder = os.path.join(FOLDER, f"account_{account}")
+    os.makedirs(folder, exist_ok=True)
+    config = LoaderConfig(CONFIG)
+    config.infos_file = os.path.join(folder, "infos.yaml")
+    config.domain = server.domain
+    settings = key_settings(config.budget, server.domain)
+    budget = bucket(server.domain, **dict(settings, per_minute=per_minute))
+    updater = Updater(config, lambda *args: None, acquire=budget.acquire)
+    timeout = config.timeouts.page_load
+
+    def update():
+        return not updater.update(server.url, None, HttpDriver(account, timeout))
+
+    return update, lambda: None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="load test the update")
+    parser.add_argument("--mode", choices=("chrome", "cdp", "http"), default="chrome")
+    parser.add_argument("--accounts", type=int, default=4)
+    parser.add_argument("--updates", type=int, default=5, help="per account")
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds")
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--per-minute", type=int, default=600, help="page loads budget")
+    args = parser.parse_args()
+
+    shutil.rmtree(FOLDER, ignore_errors=True)
+    config = LoaderConfig(CONFIG)
+    server_kw = dict(latency=args.latency, failure_rate=args.failure_rate)
+    account_func = chrome_account if args.mode == "chrome" else http_account
+    account_func = partial(account_func, per_minute=args.per_minute)
+
+    with SiteServer(config, **server_kw) as server, Sampler() as sampler:
+        results = []
+        if args.mode == "cdp":
+            start = time.perf_counter()
+            asyncio.run(
+                cdp_updates(
+                    server, args.accounts, args.updates, args.per_minute, results
+                )
+            )
+            duration = time.perf_counter() - start
+        else:
+            accounts = [account_func(server, i) for i in range(args.accounts)]
+
+            def run(account):
+                update, _ = account
+                for _ in range(args.updates):
+                    start = time.perf_counter()
+                    ok = update()
+                    results.append((time.perf_counter() - start, ok))
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.accounts) as executor:
+                list(executor.map(run, accounts))
+            duration = time.perf_counter() - start
+
+            for _, stop in accounts:
+                stop()
+
+    latencies = [latency for latency, _ in results]
+    errors = sum(not ok for _, ok in results)
+    n = len(results)
+    print(f"{args.mode}: {args.accounts} accounts, {n} updates, {errors} errors")
+    print(f"updates/min: {n * 60 / duration:.1f}")
+    print(
+        "latency p50/p95/p99: "
+        + "/".join(f"{_percentile(latencies, p):.2f}s" for p in (50, 95, 99))
+    )
+    print(f"peak RSS: {sampler.peak_rss / 2**20:.0f} MB")
+    print(f"peak Chrome processes: {sampler.peak_chromes}")
+    print(f"pages served: {server.hits}")
+    print(f"budget: {bucket(server.domain).stats()}")
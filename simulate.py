@@ -0,0 +1,29 @@
+import argparse
+import time
+
+from tctg.simulator import Simulator
+
+CONFIG = "config.yaml"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="simulate the updates")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--speed", type=float, default=300, help="seeding pts/day")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with Simulator.from_file(
+        CONFIG, seed=args.seed, error_rate=args.error_rate, speed=args.speed
+    ) as simulator:
+        start = time.perf_counter()
+        stats = simulator.run(args.days)
+        duration = time.perf_counter() - start
+
+    infos = simulator.infos.infos
+    print(f"{args.days} days simulated in {duration:.2f}s")
+    print(f"updates: {stats.updates} ({stats.forced} forced, {stats.errors} errors)")
+    print(f"bonuses: {stats.bonuses}, rewards: {stats.rewards} ({stats.gb:g} GB)")
+    print(f"bonus: {infos.bonus:,.0f}, consecutive days: {infos.consecutive_days}")
+    print(f"speed: {infos.speed} ±{infos.speed_error} pts/day ({args.speed} real)")
+    print(f"reward in {infos.reward_in_days} days")
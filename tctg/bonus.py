@@ -1,10 +1,15 @@
 from dataclasses import dataclass
 from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
 
 from tools.loader import YamlMapping, YamlSequence
 
 SECONDS_A_HOUR = 3600
 SECONDS_A_DAY = SECONDS_A_HOUR * 24
+# two-sided 95% confidence
+Z_95 = 1.96
 
 
 @dataclass
@@ -13,15 +18,9 @@ class Bonus(YamlMapping):
     bonus: float
     dbonus: float
 
-    def days_to(self, end):
-        return (end.date.date() - self.date.date()).days
-
     def seconds_to(self, end):
         return (end.date - self.date).total_seconds()
 
-    def bonus_to(self, end):
-        return end.bonus - self.bonus
-
 
 class Bonuses(list, YamlSequence):
     def add(self, **bonus):
@@ -36,17 +35,72 @@ class Bonuses(list, YamlSequence):
     def _pairs(self):  # [0, 1, 2] -> [[0, 1], [1, 2]]
         return list(zip(iter(self), iter(self[1:])))
 
+    def _arrays(self):
+        t = np.fromiter((b.date.timestamp() for b in self), float, len(self))
+        bonus = np.fromiter((b.bonus for b in self), float, len(self))
+        dbonus = np.fromiter((b.dbonus for b in self), float, len(self))
+        days = np.fromiter((b.date.toordinal() for b in self), int, len(self))
+        return t, bonus, dbonus, days
+
+    @staticmethod
+    def _segments(bonus, dbonus, days):
+        """segment index of each sample, split on events that break the speed"""
+        cross_days = np.diff(days)
+        breaks = (
+            ((cross_days == 1) & (dbonus[1:] == 0))  # missing bonus
+            | (np.diff(bonus) < 0)  # consummed bonus
+            | (cross_days > 1)  # cross more than one day
+        )
+        return np.concatenate(([0], np.cumsum(breaks)))
+
+    def intervals(self):
+        """(seconds, seeding pts) of each interval within a segment"""
+        t, bonus, dbonus, days = self._arrays()
+        same = np.diff(self._segments(bonus, dbonus, days)) == 0
+        seeding = bonus - np.cumsum(dbonus)
+        return np.diff(t)[same], np.diff(seeding)[same]
+
     def speed(self, config):
-        if len(self) >= 2:
-            dt = 0
-            bonus = 0
-            for begin, end in self._pairs():
-                dt += begin.seconds_to(end)
-                bonus += begin.bonus_to(end) - end.dbonus
-            # do we have enough to compute speed ?
-            if dt >= config.bonuses.compute_speed_min_hours * SECONDS_A_HOUR:
-                return bonus * SECONDS_A_DAY / dt
-        return None
+        """
+        least squares seeding speed (pts/day) shared by all the segments,
+        each segment having its own intercept, with a 95% confidence interval
+        """
+        if len(self) < 2:
+            return None
+
+        t, bonus, dbonus, days = self._arrays()
+        # seeding bonus only, without the daily bonuses
+        seeding = bonus - np.cumsum(dbonus)
+        segment = self._segments(bonus, dbonus, days)
+
+        # keep the segments with at least 2 samples
+        count = np.bincount(segment)
+        keep = count[segment] >= 2
+        t, seeding, segment = t[keep], seeding[keep], segment[keep]
+        count = count[count >= 2]
+        segment = np.unique(segment, return_inverse=True)[1]
+
+        # do we have enough to compute speed ?
+        starts = np.flatnonzero(np.diff(segment, prepend=-1))
+        ends = np.append(starts[1:], len(t)) - 1
+        duration = np.sum(t[ends] - t[starts])
+        if duration < config.bonuses.compute_speed_min_hours * SECONDS_A_HOUR:
+            return None
+
+        # center each segment
+        dt = t - (np.bincount(segment, weights=t) / count)[segment]
+        dy = seeding - (np.bincount(segment, weights=seeding) / count)[segment]
+        sxx = np.dot(dt, dt)
+        slope = np.dot(dt, dy) / sxx
+
+        # standard error of the shared slope
+        dof = len(t) - len(count) - 1
+        residuals = dy - slope * dt
+        error = np.sqrt(np.dot(residuals, residuals) / dof / sxx) if dof > 0 else 0
+
+        speed = slope * SECONDS_A_DAY
+        error *= Z_95 * SECONDS_A_DAY
+        return SimpleNamespace(value=speed, low=speed - error, high=speed + error)
 
     def crop(self, config):
         if len(self) >= 2:
@@ -73,15 +127,3 @@ class Bonuses(list, YamlSequence):
             if end not in compressed:
                 compressed.append(end)
             self._set(compressed)
-
-            # crop before an event that breaks the speed computation
-            for begin, end in reversed(self._pairs()):
-                cross_days = begin.days_to(end)
-                if (
-                    (cross_days == 1 and end.dbonus == 0)  # missing bonus
-                    or begin.bonus_to(end) < 0  # consummed bonus
-                    or cross_days > 1  # cross more than one day
-                ):
-                    crop_index = self.index(end)
-                    self._set(self[crop_index:])
-                    break
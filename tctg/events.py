@@ -1,5 +1,7 @@
 from enum import Enum
 
+from tools.style import Style
+
 Events = Enum(
     "Event",
     (
@@ -14,5 +16,12 @@ Events = Enum(
         "unhide",
         "close",
         "logo",
+        "profiling",
     ),
 )
+
+
+def log_txts(*txts, main=False):
+    """Events.log value"""
+    prompt = Style("\n").smaller(5) if main else " •"
+    return prompt, " ", *txts
@@ -0,0 +1,125 @@
+import json
+import math
+import os
+from datetime import datetime
+
+# the sampled Infos fields
+FIELDS = (
+    "bonus",
+    "dbonus",
+    "ratio",
+    "ul",
+    "dl",
+    "seeding",
+    "n_messages",
+    "connected",
+)
+# exported (name, numpy dtype)
+COLUMNS = (
+    ("account", "U32"),
+    ("date", "datetime64[s]"),
+    ("bonus", "f8"),
+    ("dbonus", "f8"),
+    ("ratio", "f8"),
+    ("ul_gb", "f8"),
+    ("dl_gb", "f8"),
+    ("seeding", "i8"),
+    ("n_messages", "i8"),
+    ("connected", "?"),
+    ("got_bonus", "?"),
+)
+_gb_factors = {
+    unit: 1024**power
+    for power, unit in enumerate(("B", "KB", "MB", "GB", "TB", "PB"), start=-3)
+}
+
+
+def _gb(size):
+    value, unit = size
+    return value * _gb_factors.get(unit, math.nan)
+
+
+def _date(line):
+    """the iso date of a history line, written first by History.add"""
+    return line[10:29]
+
+
+def _seek(f, date):
+    """
+    f at a line start before the first line dated from date,
+    bisects the chronological lines, f: opened in binary
+    """
+    lo, hi = 0, os.fstat(f.fileno()).st_size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        f.seek(mid)
+        f.readline()  # to the next line start
+        line = f.readline()
+        if line and _date(line) < date:
+            lo = mid + 1
+        else:
+            hi = mid
+    f.seek(max(lo - 1, 0))
+    if lo:
+        f.readline()
+
+
+def row(account, sample):
+    """the COLUMNS values of a sample"""
+    return (
+        account,
+        sample["date"],
+        sample["bonus"],
+        sample["dbonus"],
+        sample["ratio"],
+        _gb(sample["ul"]),
+        _gb(sample["dl"]),
+        sample["seeding"],
+        sample["n_messages"],
+        sample["connected"],
+        sample["got_bonus"],
+    )
+
+
+class History:
+    """
+    append only history.jsonl next to the infos_file, a line per
+    successful update, never cropped unlike the Bonuses
+    """
+
+    def __init__(self, infos_file):
+        folder = os.path.dirname(infos_file)
+        self.filename = os.path.join(folder, "history.jsonl")
+
+    def add(self, infos, got_bonus):
+        sample = dict(date=infos.date.isoformat(timespec="seconds"))
+        sample.update((name, getattr(infos, name)) for name in FIELDS)
+        sample["got_bonus"] = got_bonus
+        with open(self.filename, "a", encoding="utf8") as f:
+            f.write(f"{json.dumps(sample)}\n")
+
+    def samples(self, since=None, until=None, after=None):
+        """
+        streamed samples dict, since & until: included datetime,
+        after: excluded datetime, eg the last exported sample
+        """
+        if not os.path.exists(self.filename):
+            return
+        since, until, after = (
+            date and date.isoformat(timespec="seconds").encode()
+            for date in (since, until, after)
+        )
+        with open(self.filename, "rb") as f:
+            if start := max(since or b"", after or b""):
+                _seek(f, start)
+            for line in f:
+                # filtered before being parsed
+                date = _date(line)
+                if until and date > until:
+                    break
+                if (since and date < since) or (after and date <= after):
+                    continue
+                if line.strip():
+                    sample = json.loads(line)
+                    sample["date"] = datetime.fromisoformat(sample["date"])
+                    yield sample
@@ -1,8 +1,7 @@
-import re
 from bisect import bisect
 from contextlib import contextmanager
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import partial
 from types import SimpleNamespace
 
@@ -12,9 +11,10 @@ from tools.loader import Loader, YamlMapping
 from tools.style import Style
 
 from .bonus import Bonuses
+from .history import History
+from .planner import best_claims, best_offer, reward_eta
 
-interline = Style("\n").smaller(4)
-row = lambda *args: (*args, "\n")
+interline = (Style().smaller(4),)
 h0 = Style().bold.bigger(7)
 h1 = Style().bold.bigger(3)
 h2 = Style().bold.bigger()
@@ -39,7 +39,10 @@ class Infos(YamlMapping):
     bonus_date: datetime = None
     bonuses: Bonuses = field(default_factory=Bonuses)
     speed: int = 0
+    speed_error: int = 0
     reward_in_days: int = 0
+    offers: list = field(default_factory=list)  # [pts, gb] of mybonus
+    offers_date: datetime = None
 
 
 class InfosHandler:
@@ -47,41 +50,40 @@ class InfosHandler:
         self.config = config
         self.loader = Loader(config.infos_file)
         self.infos = self.loader.load() or Infos()
+        self.history = History(config.infos_file)
 
     def save(self):
         self.loader.save(self.infos)
 
-    def _update(self, infos_txt, mailbox_txt, attendance_txt, update_date):
-        infos = self.infos
-
-        raw = re.sub(r"\[[\w\s]+\]|Torrents", "", infos_txt)
-        raw = [e.strip() for e in re.split(r"(\w+\s?):", raw)[1:]]
-        raw = dict(zip((k.lower() for k in raw[::2]), raw[1::2]))
-        raw = SimpleNamespace(**raw)
+    # fields extracted from each attendance.php snapshot
+    required_fields = (
+        "connected",
+        "bonus",
+        "dbonus",
+        "ratio",
+        "ul",
+        "dl",
+        "seeding",
+        "n_messages",
+    )
+    # only there when the daily bonus has just been obtained
+    bonus_fields = "click_days", "consecutive_days"
 
-        bonus, dbonus = re.findall(r"[,\.\d]+", raw.bonus)
-        ul = raw.envoyé.split()
-        dl = raw.téléchargé.split()
+    def _update(self, fields, update_date):
+        infos = self.infos
 
-        infos.n_messages = int(re.findall(r"\d+", mailbox_txt.split("\n")[1])[0])
+        if missing := [name for name in self.required_fields if name not in fields]:
+            raise ValueError(f"champs manquants: {', '.join(missing)}")
 
-        if "jour" in attendance_txt:
-            click_days, consecutive_days = re.findall(r"(\d+)", attendance_txt)[:2]
+        if all(name in fields for name in self.bonus_fields):
             infos.bonus_date = update_date
+            names = *self.required_fields, *self.bonus_fields
         else:
-            click_days = infos.click_days or 0
-            consecutive_days = infos.consecutive_days or 0
+            names = self.required_fields
 
         infos.date = update_date
-        infos.connected = raw.connectable == "Oui"
-        infos.bonus = float(bonus.replace(",", ""))
-        infos.dbonus = float(dbonus.replace(",", ""))
-        infos.ratio = float("inf") if raw.ratio == "Inf." else float(raw.ratio)
-        infos.ul = float(ul[0]), ul[1]
-        infos.dl = float(dl[0]), dl[1]
-        infos.seeding = int(raw.actifs.split()[0])
-        infos.click_days = int(click_days)
-        infos.consecutive_days = int(consecutive_days)
+        for name in names:
+            setattr(infos, name, fields[name])
 
         return update_date == infos.bonus_date  # got_bonus
 
@@ -97,7 +99,15 @@ class InfosHandler:
             dbonus=infos.dbonus if got_bonus else 0,
         )
         infos.bonuses.crop(config)
-        infos.speed = round(infos.bonuses.speed(config) or infos.speed or 0)
+        if speed := infos.bonuses.speed(config):
+            infos.speed = round(speed.value)
+            infos.speed_error = round(speed.high - speed.value)
+
+        self.update_reward()
+
+    def update_reward(self):
+        config = self.config
+        infos = self.infos
 
         # update reward_in_days
         bonus_days, bonus_pts = zip(*config.bonus.consecutive_days)
@@ -108,7 +118,7 @@ class InfosHandler:
 
         consecutive_days = infos.consecutive_days
         dbonus = infos.dbonus - bonus_consecutive(consecutive_days)
-        left = config.reward.pts - infos.bonus
+        left = self.reward.pts - infos.bonus
         infos.reward_in_days = 0
         while left > 0:
             infos.reward_in_days += 1
@@ -123,22 +133,63 @@ class InfosHandler:
         finally:
             self._update_end()
             self.save()
+            infos = self.infos
+            if infos.date == update_date:  # not failed
+                self.history.add(infos, got_bonus=infos.bonus_date == update_date)
 
     @property
     def bonus(self):
         return self.infos.bonus
 
-    def check_config_bonus(self, bonus_rules):
-        values = [int(v) for v in re.findall(r"(\d+)", bonus_rules)]
+    def offers_expired(self, date):
+        offers_date = self.infos.offers_date
+        ttl = timedelta(hours=self.config.reward.offers_ttl_hours)
+        return offers_date is None or date - offers_date > ttl
+
+    def set_offers(self, offers, date):
+        """cached till offers_ttl_hours, none found: config.reward is used"""
+        self.infos.offers = offers
+        self.infos.offers_date = date
+
+    @property
+    def reward(self):
+        """the best pts/gb tier, config.reward if the offers are unknown"""
+        reward = self.config.reward
+        pts, gb = best_offer(self.infos.offers or [(reward.pts, reward.gb)])
+        return SimpleNamespace(pts=pts, gb=gb)
+
+    def claims(self):
+        """
+        the (pts, gb) offers to claim for the most GB of the whole bonus,
+        only the best GB per pt ones: the pts left keep for the next updates,
+        when spent on a worse offer they'd be lost for a better one
+        """
+        reward = self.config.reward
+        offers = self.infos.offers or [(reward.pts, reward.gb)]
+        pts, gb = best_offer(offers)
+        offers = [offer for offer in offers if offer[1] * pts >= gb * offer[0]]
+        return best_claims(offers, self.infos.bonus, reward.max_claims)
+
+    def new_config_bonus(self, values):
+        """the bonus rules parsed in values if they changed, else None"""
+        if len(values) < 3:
+            return None  # not the rules
         _iter = iter(values[3:])
         config_bonus = Config(
             added_per_day=values[1],
             max=values[2],
             consecutive_days=[[days, bonus] for days, bonus in zip(_iter, _iter)],
         )
-        if self.config.bonus != config_bonus:
-            self.config.bonus = config_bonus
-            self.config.save()
+        return config_bonus if self.config.bonus != config_bonus else None
+
+    def set_config_bonus(self, config_bonus):
+        """saved, only by the process that watches the config"""
+        self.config.bonus = config_bonus
+        self.config.save()
+
+    def check_config_bonus(self, values):
+        if config_bonus := self.new_config_bonus(values):
+            self.set_config_bonus(config_bonus)
             return True
         return False
 
@@ -146,29 +197,40 @@ class InfosHandler:
         infos = self.infos
         config = self.config
         day, hour = day_hour(infos.date)
-        rows = (
-            *row(h0(config.title).blue),
-            *row(h3(day).blue, h4(" à ").blue, h2(hour).blue),
-            *row(
+
+        # reward planner range
+        percentiles = config.planner.percentiles
+        chance = percentiles[-1] - percentiles[0]
+        reward = self.reward
+        etas = reward_eta(infos, config, [reward.pts])[0]
+        eta_min, eta_max = (
+            "∞" if eta == float("inf") else f"{eta:.0f}" for eta in (etas[0], etas[-1])
+        )
+
+        # one keyed row per line
+        return dict(
+            title=(h0(config.title).blue,),
+            date=(h3(day).blue, h4(" à ").blue, h2(hour).blue),
+            connected=(
                 h2(f"{'' if infos.connected else 'Pas '}Connecté").warn(
                     not infos.connected
                 ),
             ),
-            *row(
+            messages=(
                 h1("✉").blue,
                 h1(f" {infos.n_messages}").warn(infos.n_messages >= 1),
             ),
-            interline,
-            *row(h1("Bonus ").blue, *number(h1(infos.bonus).green)),
-            *row(
+            bonus_space=interline,
+            bonus=(h1("Bonus ").blue, *number(h1(infos.bonus).green)),
+            days=(
                 h3(infos.click_days).blue,
                 h5(f" {plural('jour', infos.click_days)},  "),
                 h2(infos.consecutive_days).blue,
                 h5(" de suite"),
             ),
-            *row(*number(h3(infos.dbonus).blue), h5(" pts/jour")),
-            interline,
-            *row(
+            dbonus=(*number(h3(infos.dbonus).blue), h5(" pts/jour")),
+            ratio_space=interline,
+            ratio=(
                 h1("Ratio ").blue,
                 *number(
                     h1("∞" if infos.ratio == float("inf") else infos.ratio).warn(
@@ -176,42 +238,44 @@ class InfosHandler:
                     )
                 ),
             ),
-            *row(
+            ul=(
                 h2(config.UI.up_arrow).green,
                 *number(h2(infos.ul[0]).green),
                 h5(f" {infos.ul[1]}  "),
                 h2(f"{config.UI.up_arrow}{infos.seeding}").warn(infos.seeding == 0),
                 h5(f" {plural('seed', infos.seeding)}"),
             ),
-            *row(
+            dl=(
                 h2(config.UI.down_arrow).red,
                 *number(h2(infos.dl[0]).red),
                 h5(f" {infos.dl[1]}"),
             ),
-            interline,
-            *row(
+            reward_space=interline,
+            reward=(
                 h1("Cadeau").blue,
                 h3(" à ").blue,
-                *number(h1(config.reward.pts).green),
+                *number(h1(reward.pts).green),
             ),
-            *row(
-                *number(h2(config.reward.gb).green),
+            reward_in=(
+                *number(h2(reward.gb).green),
                 h5(" GB dans "),
                 h2(infos.reward_in_days).blue,
                 h5(f" {plural('jour', infos.reward_in_days)}"),
             ),
-            *row(
+            reward_range=(
+                h5(f"{chance}% de chances entre "),
+                h3(eta_min).blue,
+                h5(" et "),
+                h3(eta_max).blue,
+                h5(" jours"),
+            ),
+            speed=(
                 *number(h3(infos.speed + infos.dbonus).blue, 0),
-                h5(" pts/jour, "),
+                h5(f" ±{infos.speed_error} pts/jour, "),
                 *number(
-                    h2(
-                        config.reward.gb
-                        * (infos.speed + infos.dbonus)
-                        / config.reward.pts
-                    ).blue,
+                    h2(reward.gb * (infos.speed + infos.dbonus) / reward.pts).blue,
                     2,
                 ),
                 h5(" GB/jour"),
             ),
         )
-        return rows[:-1]  # remove the last "\n" from the last row
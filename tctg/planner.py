@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+
+from .bonus import SECONDS_A_DAY, SECONDS_A_HOUR
+
+
+def reward_eta(infos, config, targets, seed=0):
+    """
+    days needed to get each of the targets pts, as config.planner.percentiles,
+    over vectorized scenarios of missed days & seeding speeds resampled
+    from infos.bonuses, inf when not reached within config.planner.max_days
+    """
+    planner = config.planner
+    bonus = config.bonus
+    rng = np.random.default_rng(seed)
+    shape = planner.scenarios, planner.max_days
+
+    # a missed day resets the consecutive days
+    clicked = rng.random(shape, dtype=np.float32) >= planner.miss_day_percent / 100
+    day = np.arange(1, planner.max_days + 1, dtype=np.int32)
+    last_missed = np.maximum.accumulate(np.where(clicked, 0, day), axis=1)
+    consecutive = np.where(last_missed, day - last_missed, infos.consecutive_days + day)
+
+    # consecutive days brackets, the site rules in every scenario
+    bonus_days, bonus_pts = zip(*bonus.consecutive_days)
+    bonus_pts = np.array((0, *bonus_pts))
+
+    def bonus_consecutive(days):
+        return bonus_pts[np.searchsorted(bonus_days, days, side="right")]
+
+    # daily bonus grows with each click
+    dbonus = infos.dbonus - bonus_consecutive(infos.consecutive_days)
+    dbonus = np.minimum(
+        dbonus + np.cumsum(clicked, axis=1) * bonus.added_per_day, bonus.max
+    )
+
+    # seeding speed of the recorded intervals resampled in each scenario
+    dt, seeding = infos.bonuses.intervals()
+    if np.sum(dt) >= config.bonuses.compute_speed_min_hours * SECONDS_A_HOUR:
+        picks = rng.integers(len(dt), size=(planner.scenarios, len(dt)))
+        speed = seeding[picks].sum(axis=1, keepdims=True) * SECONDS_A_DAY
+        speed /= dt[picks].sum(axis=1, keepdims=True)
+    else:
+        speed = infos.speed
+    gain = clicked * (dbonus + bonus_consecutive(consecutive)) + np.maximum(speed, 0)
+    gained = np.cumsum(gain, axis=1)
+
+    etas = []
+    for target in targets:
+        reached = gained >= target - infos.bonus
+        days = np.where(reached.any(axis=1), reached.argmax(axis=1) + 1, np.inf)
+        if target <= infos.bonus:
+            days[:] = 0
+        etas.append(np.percentile(days, planner.percentiles, method="higher"))
+    return np.array(etas)
+
+
+def best_offer(offers):
+    """the (pts, gb) offer with the most GB per pt, the cheapest if tied"""
+    return max(offers, key=lambda offer: (offer[1] / offer[0], -offer[0]))
+
+
+def best_claims(offers, balance, max_claims):
+    """
+    the (pts, gb) offers to claim for the most GB within balance pts,
+    an unbounded knapsack capped to max_claims, in pts units of their gcd
+    """
+    offers = [(pts, gb) for pts, gb in offers if 0 < pts <= balance]
+    if not offers:
+        return []
+    unit = math.gcd(*(int(pts) for pts, _ in offers))
+    cap = int(balance // unit)
+
+    # gb[c]: the most GB within c units, with one more claim each round
+    gb = np.zeros(cap + 1)
+    choices = []
+    for _ in range(max_claims):
+        claimed, choice = gb.copy(), np.full(cap + 1, -1)
+        for i, (pts, offer_gb) in enumerate(offers):
+            w = int(pts) // unit
+            candidate = np.full(cap + 1, -np.inf)
+            candidate[w:] = gb[: cap + 1 - w] + offer_gb
+            better = candidate > claimed
+            claimed[better] = candidate[better]
+            choice[better] = i
+        choices.append(choice)
+        gb = claimed
+
+    plan, c = [], cap
+    for choice in reversed(choices):
+        if (i := choice[c]) >= 0:
+            plan.append(offers[i])
+            c -= int(offers[i][0]) // unit
+    return sorted(plan, reverse=True)
@@ -0,0 +1,86 @@
+import os
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from tools.loader import Loader, YamlMapping
+
+HOURS = 24
+# prior of an hour without runs
+PRIOR_RUNS = 2
+PRIOR_LATENCY = 30  # seconds
+SLOT_MINUTES = 5
+
+
+def _per_hour(value=0):
+    return field(default_factory=lambda: [value] * HOURS)
+
+
+@dataclass
+class Runs(YamlMapping):
+    """per hour of the day latency & outcomes of the updates"""
+
+    runs: list = _per_hour()
+    errors: list = _per_hour()
+    bonuses: list = _per_hour()
+    latency: list = _per_hour(0.0)  # seconds, sum
+
+    def add(self, date, seconds, outcome):
+        """outcome: "bonus", "already" or "error" """
+        hour = date.hour
+        self.runs[hour] += 1
+        self.errors[hour] += outcome == "error"
+        self.bonuses[hour] += outcome == "bonus"
+        self.latency[hour] += seconds
+
+    def _prior_latency(self):
+        n_runs = sum(self.runs)
+        return sum(self.latency) / n_runs if n_runs else PRIOR_LATENCY
+
+    def expected_latency(self, hour):
+        """mean latency shrunk toward the all hours mean"""
+        prior = self._prior_latency()
+        runs = self.runs[hour]
+        return (self.latency[hour] + prior * PRIOR_RUNS) / (runs + PRIOR_RUNS)
+
+    def success(self, hour):
+        """Laplace smoothed success rate"""
+        return (self.runs[hour] - self.errors[hour] + 1) / (self.runs[hour] + 2)
+
+    def weight(self, hour):
+        """the faster & the more reliable, the more often picked"""
+        return self.success(hour) / max(self.expected_latency(hour), 1)
+
+    def sample(self, start, end, rnd):
+        """
+        a date between start & end, the SLOT_MINUTES slots are
+        weighted by their hour, uniform inside the picked slot
+        """
+        slot = timedelta(minutes=SLOT_MINUTES)
+        slots = []
+        while start + len(slots) * slot < end:
+            slots.append(start + len(slots) * slot)
+        if len(slots) <= 1:
+            return start + (end - start) * rnd.random()
+
+        weights = [self.weight(date.hour) for date in slots]
+        date = rnd.choices(slots, weights)[0]
+        return date + min(slot, end - date) * rnd.random()
+
+
+class RunsHandler:
+    """Runs saved next to the infos_file"""
+
+    def __init__(self, infos_file):
+        folder = os.path.dirname(infos_file)
+        self.loader = Loader(os.path.join(folder, "runs.yaml"))
+        self.runs = self.loader.load() or Runs()
+
+    def add(self, date, seconds, outcome):
+        self.runs.add(date, seconds, outcome)
+        self.loader.save(self.runs)
+
+    def sample(self, start, end, rnd):
+        return self.runs.sample(start, end, rnd)
+
+    def expected_latency(self, date):
+        return self.runs.expected_latency(date.hour)
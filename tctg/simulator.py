@@ -0,0 +1,304 @@
+import os
+import random
+import tempfile
+from bisect import bisect
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from html import escape
+from types import SimpleNamespace
+from urllib.parse import parse_qsl, urljoin, urlsplit
+
+from lxml import html
+
+from tools.clock import VirtualClock
+from tools.loader import Loader
+from tools.schedule import Duration, Schedule
+
+from .bonus import SECONDS_A_DAY
+from .updater import Updater
+from .worker import site_url
+
+_page = """<html><head><meta charset="utf-8"><title>{title}</title></head><body>
+<table id="info_block"><tr>
+<td class="text"><span class="medium">{infos_txt}</span></td>
+<td><a href="messages.php">{mailbox_title}</a><br>
+{mailbox_count}</td>
+</tr></table>
+<table><tr><td class="text">{body}</td></tr></table>
+{extra}
+</body></html>"""
+
+_rules = """<table><tr><td class="embedded"><ul>
+<li>1 clic par jour</li>
+<li>{bonus.added_per_day} points de plus chaque jour</li>
+<li>{bonus.max} points maximum</li>
+{consecutive}
+</ul></td></tr></table>"""
+
+_offer = """<tr><td class="rowhead_center"><b>{option}</b></td>
+<td class="rowfollow"><h1>{gb} GB Envoyé</h1>Points bonus échangés contre de l'envoi.</td>
+<td class="rowfollow">{pts:,}</td>
+<td class="rowfollow"><form method="post" action="mybonus.php?action=exchange&pts={pts}">
+<input type="submit" value="Échanger !"></form></td></tr>"""
+
+
+class SimulatedSite:
+    """tracker model rendering the pages the site profile parses"""
+
+    # (pts, gb) offered besides config.reward
+    offers = (10000, 15), (60000, 110)
+
+    def __init__(self, config, rnd, speed=300, n_messages=0):
+        self.config = config
+        self.rnd = rnd
+        self.speed = speed  # seeding pts/day
+        self.n_messages = n_messages
+        self.date = None
+        self.bonus = 0
+        self.dbonus = 0
+        self.click_days = 0
+        self.consecutive_days = 0
+        self.click_date = None
+        self.claims = []  # (date, pts, gb)
+
+    def _consecutive_bonus(self, days):
+        bonus_days, bonus_pts = zip(*self.config.bonus.consecutive_days)
+        return (0, *bonus_pts)[bisect(bonus_days, days)]
+
+    def _seed(self, date):
+        if self.date:
+            dt = (date - self.date).total_seconds()
+            self.bonus += self.speed * self.rnd.uniform(0.5, 1.5) * dt / SECONDS_A_DAY
+        self.date = date
+
+    def _click(self, date):
+        if self.click_date == date.date():
+            return False
+
+        # a missed day resets the consecutive days
+        yesterday = date.date() - timedelta(days=1)
+        self.consecutive_days = (
+            self.consecutive_days + 1 if self.click_date == yesterday else 1
+        )
+        self.click_days += 1
+        self.click_date = date.date()
+        bonus = self.config.bonus
+        daily = min(self.click_days * bonus.added_per_day, bonus.max)
+        self.dbonus = daily + self._consecutive_bonus(self.consecutive_days)
+        self.bonus += self.dbonus
+        return True
+
+    def _texts(self, date, click):
+        """(infos_txt, mailbox_txt, attendance_txt) of attendance.php"""
+        self._seed(date)
+        if click and self._click(date):
+            attendance_txt = (
+                f"Vous avez {self.click_days} jours de présence, "
+                f"{self.consecutive_days} jours consécutifs."
+            )
+        else:
+            attendance_txt = "Bonus déjà obtenu, revenez demain."
+
+        infos_txt = (
+            "Ratio: 1.234 Envoyé: 1.5 TB Téléchargé: 512.3 GB "
+            f"Actifs: {max(1, round(self.speed / 30))} [Torrents] Connectable: Oui "
+            f"Bonus: {self.bonus:,.1f} [Échanger] (+{self.dbonus})"
+        )
+        mailbox_txt = f"Messagerie\n{self.n_messages} nouveau(x)"
+        return infos_txt, mailbox_txt, attendance_txt
+
+    def _page(self, date, body="", extra="", click=False, title="TCTG"):
+        infos_txt, mailbox_txt, attendance_txt = self._texts(date, click)
+        mailbox_title, mailbox_count = mailbox_txt.split("\n")
+        return _page.format(
+            title=title,
+            infos_txt=escape(infos_txt),
+            mailbox_title=mailbox_title,
+            mailbox_count=mailbox_count,
+            body=escape(attendance_txt) if click else body,
+            extra=extra,
+        )
+
+    def render(self, page, date, method="GET", query=None):
+        """html of the page, None if not found"""
+        config = self.config
+        query = query or {}
+
+        if page == "attendance.php":
+            consecutive = "\n".join(
+                f"<li>{days} jours de suite: {bonus} points</li>"
+                for days, bonus in config.bonus.consecutive_days
+            )
+            rules = _rules.format(bonus=config.bonus, consecutive=consecutive)
+            return self._page(date, extra=rules, click=True)
+
+        if page == "mybonus.php":
+            offers = sorted((*self.offers, (config.reward.pts, config.reward.gb)))
+            if method == "POST" and query.get("action") == "exchange":
+                pts = int(query.get("pts", 0))
+                if self.bonus < pts:
+                    return self._page(date, "Pas assez de bonus")
+                self.claim(date, pts, dict(offers)[pts])
+                return self._page(date, "<h2>Toutes nos félicitations!</h2>")
+
+            offers = "".join(
+                _offer.format(option=option, pts=pts, gb=gb)
+                for option, (pts, gb) in enumerate(offers, start=1)
+            )
+            return self._page(date, extra=f"<table>{offers}</table>")
+
+        if page in ("messages.php", "index.php"):
+            return self._page(date)
+
+        return None
+
+    def claim(self, date, pts, gb):
+        self.bonus -= pts
+        self.claims.append((date, pts, gb))
+
+
+class _SimulatedElement:
+    def __init__(self, driver, element):
+        self.driver = driver
+        self.element = element
+
+    def click(self):
+        """submits its form"""
+        if forms := self.element.xpath("ancestor-or-self::form"):
+            action = urljoin(self.driver.current_url, forms[0].get("action"))
+            self.driver.get(action, method=forms[0].get("method", "GET").upper())
+
+
+class SimulatedDriver:
+    """
+    the part of tools.chrome.Chrome the Updater drives, the pages are
+    rendered by a SimulatedSite at the VirtualClock time
+    """
+
+    def __init__(self, site, clock, fail=False):
+        """fail: the first page load raises"""
+        self.site = site
+        self.clock = clock
+        self.fail = fail
+        self.error = None
+        self.log = self.archive = None
+        self.launch_duration = 0
+        self.browser_pid = None
+        self.page_source = self.current_url = ""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type:
+            self.error = SimpleNamespace(
+                name=exc_type.__name__,
+                file=os.path.split(exc_tb.tb_frame.f_code.co_filename)[1],
+                line=exc_tb.tb_lineno,
+            )
+        return True
+
+    def _render(self, url, method="GET"):
+        url = urlsplit(url)
+        page = url.path.rsplit("/", 1)[-1]
+        query = dict(parse_qsl(url.query))
+        return self.site.render(page, self.clock.now(), method, query)
+
+    def load_cookies(self, url):
+        pass
+
+    def get(self, url, method="GET"):
+        if self.fail:
+            raise TimeoutError(f"simulated {url} failure")
+        self.page_source = self._render(url, method) or ""
+        self.current_url = url
+
+    def fetch(self, url):
+        return self._render(url)
+
+    def load_aside(self, *urls):
+        future = Future()
+        try:
+            future.set_result([self._render(url) for url in urls])
+        except Exception as err:  # pylint: disable=broad-except
+            future.set_exception(err)
+        return future
+
+    def wait_for_clickable(self, xpath, timeout=None):
+        if not (elements := html.fromstring(self.page_source).xpath(xpath)):
+            raise TimeoutError(f"{xpath} not found")
+        return _SimulatedElement(self, elements[0])
+
+
+class Simulator:
+    """
+    drive Schedule & the Updater on a VirtualClock against a SimulatedSite,
+    no browser nor network, for benchmarking & regression testing,
+    a context that removes its infos_file
+    """
+
+    def __init__(self, config, start=None, seed=0, error_rate=0.05, **site_kw):
+        self.config = config
+        self.rnd = random.Random(seed)
+        self.clock = VirtualClock(start or datetime(2022, 1, 1))
+        self.site = SimulatedSite(config, self.rnd, **site_kw)
+        self.url = site_url(config)
+        self.error_rate = error_rate
+        self.stats = SimpleNamespace(
+            updates=0, forced=0, errors=0, bonuses=0, rewards=0, gb=0, log=[]
+        )
+
+        # keep the real infos_file untouched
+        self._folder = tempfile.TemporaryDirectory()
+        config.infos_file = os.path.join(self._folder.name, "infos.yaml")
+        self.updater = Updater(config, lambda *args: None, clock=self.clock)
+        self.infos = self.updater.infos
+
+        self.schedule = Schedule(
+            self._update, clock=self.clock, rnd=self.rnd, update=self._log_update
+        )
+        for at, jitter_minutes in config.everyday:
+            every = self.schedule.every(1).days.at(at)
+            every = every.jitter_add(jitter_minutes).minutes
+
+        retry = config.retry
+        self.retry = Duration(retry.hours, rnd=self.rnd).hours
+        self.retry = self.retry.jitter(retry.jitter_percent).percent
+
+    @classmethod
+    def from_file(cls, config_file, **kwargs):
+        return cls(Loader(config_file).load(), **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._folder.cleanup()
+
+    def _log_update(self, scheduled):
+        self.stats.updates += 1
+        self.stats.forced += not scheduled
+
+    def _update(self):
+        stats = self.stats
+        now = self.clock.now()
+        driver = SimulatedDriver(
+            self.site, self.clock, fail=self.rnd.random() < self.error_rate
+        )
+        n_claims = len(self.site.claims)
+        if self.updater.update(self.url, None, driver):
+            stats.errors += 1
+            stats.log.append((now, "error"))
+            return self.retry
+
+        stats.bonuses += self.infos.infos.bonus_date == now
+        for _, _, gb in self.site.claims[n_claims:]:
+            stats.rewards += 1
+            stats.gb += gb
+            stats.log.append((now, "reward"))
+        return None
+
+    def run(self, days=365):
+        end = self.clock.now() + timedelta(days=days)
+        self.schedule.run_until(end, right_now=self.config.update_at_start)
+        return self.stats
@@ -0,0 +1,96 @@
+import re
+
+from lxml import etree, html
+
+from tools.config import Loader  # with the !Config tag
+
+
+def _float(txt):
+    # "Inf." ratio
+    if txt.lower().startswith("inf"):
+        return float("inf")
+    return float(txt.replace(",", ""))
+
+
+_types = dict(
+    int=lambda txt: int(txt.replace(",", "")),
+    float=_float,
+    size=lambda txt: (_float(txt.split()[0]), txt.split()[1]),
+    equals=lambda txt, value: txt == value,
+    ints=lambda txt: [int(v) for v in re.findall(r"\d+", txt)],
+)
+
+
+def _text(element):
+    """close to the WebDriver element text"""
+    if isinstance(element, str):
+        return element.strip()
+
+    for br in element.iter("br"):
+        br.tail = f"\n{br.tail or ''}"
+    lines = (" ".join(line.split()) for line in element.text_content().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class SiteProfile:
+    """
+    site pages, selectors & parse rules loaded from a yaml file,
+    compiled once then applied to page snapshots
+    """
+
+    def __init__(self, filename):
+        profile = Loader(filename).load()
+        self.pages = vars(profile.pages)
+        self._wait = profile.wait
+        self._texts = {
+            name: etree.XPath(xpath) for name, xpath in vars(profile.texts).items()
+        }
+        self._parse = {
+            name: [re.compile(regex, re.S) for regex in regexes]
+            for name, regexes in vars(profile.parse).items()
+        }
+        self._offer_row = etree.XPath(profile.offers.row)
+        self._offer_parse = re.compile(profile.offers.parse)
+        self._fields = {
+            name: (_types[type_], args)
+            for name, (type_, *args) in vars(profile.fields).items()
+        }
+
+    def wait(self, name, **kwargs):
+        """xpath for the WebDriver"""
+        return getattr(self._wait, name).format(**kwargs)
+
+    def texts(self, page_source):
+        """all the texts found in a single page snapshot"""
+        root = html.fromstring(page_source)
+        texts = {}
+        for name, xpath in self._texts.items():
+            if elements := xpath(root):
+                texts[name] = _text(elements[0])
+        return texts
+
+    def _match_fields(self, regex, text, fields):
+        if match := regex.search(text):
+            for field, value in match.groupdict().items():
+                if value is not None:
+                    parse, args = self._fields[field]
+                    fields[field] = parse(value, *args)
+
+    def extract(self, page_source):
+        """all the fields found in a single page snapshot"""
+        fields = {}
+        for name, text in self.texts(page_source).items():
+            for regex in self._parse.get(name, ()):
+                self._match_fields(regex, text, fields)
+        return fields
+
+    def offers(self, page_source):
+        """[pts, gb] of each offer found in a mybonus snapshot"""
+        offers = []
+        for row in self._offer_row(html.fromstring(page_source)):
+            offer = {}
+            cells = " | ".join(map(_text, row))
+            self._match_fields(self._offer_parse, cells, offer)
+            if len(offer) == 2:
+                offers.append([offer["pts"], offer["gb"]])
+        return offers
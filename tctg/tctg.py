@@ -1,19 +1,32 @@
+import secrets
+import time
 import webbrowser
+from collections import deque
+from dataclasses import asdict
 from datetime import datetime
+from itertools import groupby
 
 from tools import day_hour, seconds_left_loc
-from tools.chrome import Chrome
+from tools.budget import bucket, key_settings
+from tools.control import ControlServer
+from tools.profile import MB, Profile
+from tools.profiling import Profiler
 from tools.schedule import Duration, Schedule
 from tools.style import Style
 
-from .events import Events
+from .events import Events, log_txts
 from .infos import InfosHandler
+from .runs import RunsHandler
+from .worker import Worker, chrome_kw, site_url
 
 h0_grey = Style().bigger().grey40
 h0 = Style().bigger().bold
 grey = Style().grey40
 h1 = Style().bold
 
+# seconds between the schedule wake-ups while hidden, ie no countdown
+HIDDEN_TICK = 10
+
 
 def _date_txts(date):
     day, hour = day_hour(date)
@@ -21,43 +34,290 @@ def _date_txts(date):
 
 
 class TCTG:
-    def __init__(self, config, event_callback):
+    def __init__(self, config, event_callback, worker=None):
+        """worker: might be already prewarmed"""
         self.config = config
         self.event = event_callback
-        self.url = f"https://{self.config.domain}"
         self.error = False
+        self.last_error = None
+        self.updating = False
+        self.metrics = dict(
+            updates=0,
+            errors=0,
+            last_duration=None,
+            worker_mb=None,
+            chrome_peak_mb=None,
+            profile_mb=None,
+            launches=deque(maxlen=10),  # Chrome launch durations trend
+        )
+        # no countdown refresh when not visible
+        self._visible = True
         self.infos = InfosHandler(config)
+        self.runs = RunsHandler(config.infos_file)
         self.show_infos()
-
-        self.chrome_kw = dict(
-            page_load_timeout=self.config.timeouts.page_load,
-            wait_elt_timeout=self.config.timeouts.wait_elt,
-            log=self.log,
-        )
+        self.set_url()
+        self.set_budget()
+        self.profile = Profile(**vars(config.profile))
+        self.set_chrome_kw()
+        self.worker = worker or Worker(**vars(config.worker))
+        self.worker.event = self.event
 
         logs = dict(update=self.log_update, next=self.log_next, left=self.log_left)
-        schedule = self.schedule = Schedule(self._update, **logs)
+        self.schedule = Schedule(self._update, **logs)
+        self.schedule.idle(self.reload_config)
+        self.schedule.idle(self.maintain_profile)
+        self.set_prewarm()
+        self.profiler = None
+        if config.profiling.enabled:
+            self.set_profiling()
 
         self.log(h1("MàJ:").underline.blue, main=True)
-        for at, jitter_minutes in config.everyday:
-            every = schedule.every(1).days.at(at).jitter_add(jitter_minutes).minutes
+        self.everys = {}
+        self.set_everyday()
+        self.set_retry()
+
+        # before the schedule that shows its state in the countdown
+        self.start_control()
+        self.schedule.start(right_now=config.update_at_start)
+
+    def start_control(self):
+        commands = dict(
+            force_update=self.force_update,
+            pause=self.pause,
+            resume=self.resume,
+            profiling_on=lambda: self.set_profiling(True),
+            profiling_off=lambda: self.set_profiling(False),
+        )
+        control = self.config.control
+        if not control.token:
+            # per install, read by control.py in the config
+            control.token = secrets.token_urlsafe()
+            self.config.save()
+        try:
+            self.control = ControlServer(
+                control.port, control.token, self.status, commands
+            )
+        except OSError as err:
+            # shown until restarted, the countdown says it too
+            self.control = None
+            self.log(h1("Contrôle indisponible: ").red, grey(err), main=True)
+            self.event(Events.set_tray_icon, True)
+            return
+        self.control.start()
+
+    @property
+    def visible(self):
+        return self._visible
+
+    @visible.setter
+    def visible(self, visible):
+        self._visible = visible
+        self.schedule.tick = 1 if visible else HIDDEN_TICK
+        if visible and (date := self.schedule.next_date):
+            # not stale till the next tick
+            self.log_left(max(0, (date - datetime.now()).total_seconds()))
+
+    def set_url(self):
+        self.url = site_url(self.config)
+
+    def set_budget(self):
+        # shared by the accounts of this process, ie of the same IP
+        domain = self.config.domain
+        self.budget = bucket(domain, **key_settings(self.config.budget, domain))
+
+    def set_chrome_kw(self):
+        # its next checks are kept
+        self.profile.set(**vars(self.config.profile))
+        self.chrome_kw = chrome_kw(self.config)
+
+    def set_prewarm(self):
+        seconds = self.config.prewarm.before_seconds
+        self.schedule.before(seconds, self.prewarm, self.worker.cancel)
+
+    def set_profiling(self, enabled=None):
+        """
+        the updates are profiled in the worker, this profiler only wraps
+        the UI events, no wrappers at all when disabled
+        """
+        profiling = self.config.profiling
+        if enabled is not None:
+            profiling.enabled = enabled
+        if self.profiler:
+            self.profiler.stop()
+            self.profiler = None
+
+        if profiling.enabled:
+            self.profiler = Profiler(
+                profiling.folder,
+                profiling.keep,
+                profiling.cprofile,
+                profiling.tracemalloc,
+            )
+            self.profiler.start()
+            self.log(h1("Profilage activé: ").red, grey(profiling.folder))
+        else:
+            self.log(h1("Profilage désactivé").blue)
+        self.event(Events.profiling, self.profiler)
+
+    def log_slow(self, name, seconds):
+        self.log(h1("Lent: ").red, grey(f"{name} en {seconds * 1000:.0f} ms"))
+
+    def prewarm(self):
+        self.worker.prewarm(self.config, self.url, self.chrome_kw)
+
+    def set_everyday(self):
+        # checked before any change to the schedule
+        if not self.config.everyday:
+            raise ValueError("aucune MàJ programmée")
+        for at, jitter_minutes in self.config.everyday:
+            datetime.strptime(at, "%H:%M")
+            if jitter_minutes < 0:
+                raise ValueError(f"jitter négatif: {jitter_minutes}")
+
+        # keep the unchanged everys and their countdowns
+        everys = {}
+        adaptive = self.config.adaptive_schedule
+        for at, jitter_minutes in self.config.everyday:
+            key = at, jitter_minutes, adaptive
+            if not (every := self.everys.pop(key, None)):
+                every = self.schedule.every(1).days.at(at)
+                every = every.jitter_add(jitter_minutes).minutes
+                if adaptive:
+                    # jitter picked where the past runs were fast & reliable
+                    every = every.sample_with(self.runs.sample)
+            everys[key] = every
             self.log(h1("Programmée: ").blue, grey(every))
 
-        retry = config.retry
+        for every in self.everys.values():
+            self.schedule.remove(every)
+        self.everys = everys
+        self.log_plan()
+
+    def plan(self):
+        """the windows of the week ahead"""
+        return self.schedule.plan(7 * len(self.everys))
+
+    def log_plan(self):
+        """a line per run of days with the same windows"""
+        days = {}
+        for start, end, _ in self.plan():
+            days.setdefault(f"{start:%d/%m}", []).append(f"{start:%Hh%M}-{end:%Hh%M}")
+        for windows, group in groupby(days.items(), key=lambda day: day[1]):
+            group = [day for day, _ in group]
+            dates = f"du {group[0]}" + (f" au {group[-1]}" if len(group) > 1 else "")
+            self.log(h1(f"Créneaux {dates}: ").blue, grey(", ".join(windows)))
+
+    def set_retry(self):
+        retry = self.config.retry
         self.retry = Duration(retry.hours).hours.jitter(retry.jitter_percent).percent
         self.log(h1("Si erreur: ").red, grey(self.retry))
 
-        schedule.start(right_now=config.update_at_start)
+    def reload_config(self):
+        """idle, an invalid config is not applied, the old one is kept"""
+        old, changed = self.config.snapshot(), set()
+        try:
+            if not (changed := self.config.reload()):
+                return
+            self.log(
+                h1("Config modifiée: ").underline.blue,
+                grey(", ".join(sorted(changed))),
+                main=True,
+            )
+            self.apply_config(changed)
+        except ValueError as err:
+            self.log(h1("Config invalide: ").red, grey(err), main=True)
+            if self.config.snapshot() is not old:
+                # back to what was applied
+                self.config.restore(old)
+                self.apply_config(changed)
+
+    def apply_config(self, changed):
+        """changed: the top level keys"""
+        if changed & {"everyday", "adaptive_schedule"}:
+            self.set_everyday()
+            self.schedule.rearm()
+        if "retry" in changed:
+            self.set_retry()
+        if changed & {"timeouts", "profile", "attach", "chrome"}:
+            self.set_chrome_kw()
+        if "domain" in changed:
+            self.set_url()
+        if changed & {"domain", "budget"}:
+            self.set_budget()
+        if "profiling" in changed:
+            self.set_profiling()
+        if "prewarm" in changed:
+            self.worker.cancel()
+            self.set_prewarm()
+        if changed & {"reward", "bonus"}:
+            self.infos.update_reward()
+            self.infos.save()
+        if changed & {"title", "infos_file", "UI", "worker", "control"}:
+            self.log(h1("Redémarrer pour appliquer les changements").red)
+        self.show_infos()
+
+    def maintain_profile(self):
+        """idle, Chrome only runs in _update or when prewarmed"""
+        if self.worker.warm or not (profile := self.profile.maintain()):
+            return
+        size = round(profile.size / MB)
+        txts = [h1("Profil Chrome: ").blue, grey(f"{size} Mo")]
+        if profile.compacted_size is not None:
+            size = round(profile.compacted_size / MB)
+            txts.append(grey(f" compacté à {size} Mo"))
+        if profile.purged_size:
+            txts.append(grey(f", caches: {round(profile.purged_size / MB)} Mo purgés"))
+        self.metrics["profile_mb"] = size
+        if launches := self.metrics["launches"]:
+            last, mean = launches[-1], sum(launches) / len(launches)
+            txts.append(grey(f", lancement {last:.1f}s (moy. {mean:.1f}s)"))
+        self.log(*txts)
 
     def stop(self):
+        if self.control:
+            self.control.stop()
         self.schedule.stop()
+        self.worker.stop()
 
     def force_update(self):
         self.schedule.force_update()
 
+    def pause(self):
+        self.schedule.pause()
+        self.log(h1("MàJ programmées en pause").red, main=True)
+
+    def resume(self):
+        self.schedule.resume()
+        self.log(h1("MàJ programmées reprises").blue, main=True)
+
+    def status(self):
+        """json friendly snapshot, called from the control thread"""
+        infos = asdict(self.infos.infos)
+        infos["bonuses"] = len(infos["bonuses"])
+        return dict(
+            infos=infos,
+            schedule=dict(
+                next=self.schedule.next_date,
+                expected_latency=round(
+                    self.runs.expected_latency(
+                        self.schedule.next_date or datetime.now()
+                    )
+                ),
+                paused=self.schedule.paused,
+                updating=self.updating,
+                plan=[
+                    dict(start=start, end=end, every=str(every))
+                    for start, end, every in self.plan()
+                ],
+            ),
+            error=self.last_error,
+            metrics=self.metrics,
+            budget=self.budget.stats(),
+            profiling=self.profiler is not None,
+        )
+
     def log(self, *txts, main=False):
-        prompt = Style("\n").smaller(5) if main else " •"
-        self.event(Events.log, (prompt, " ", *txts))
+        self.event(Events.log, log_txts(*txts, main=main))
 
     def log_update(self, scheduled):
         msg = "programmée" if scheduled else "forcée"
@@ -65,10 +325,15 @@ class TCTG:
         self.log(update, *_date_txts(datetime.now()), main=True)
 
     def log_next(self, date):
-        self.log(h1("Prochaine MàJ").blue, *_date_txts(date))
+        latency = self.runs.expected_latency(date)
+        self.log(h1("Prochaine MàJ").blue, *_date_txts(date), grey(f" ~{latency:.0f}s"))
 
     def log_left(self, seconds):
+        if not self.visible:
+            return
         error_msg = " (ERREUR)" if self.error else ""
+        error_msg += " (PAUSE)" if self.schedule.paused else ""
+        error_msg += " (SANS CONTRÔLE)" if self.control is None else ""
         left = h1(f"dans {seconds_left_loc(seconds)}{error_msg}")
         self.event(Events.log_left, left.italic.warn(self.error))
 
@@ -88,58 +353,43 @@ class TCTG:
         webbrowser.open(self.url)
 
     def _update(self):
+        self.updating = True
         self.event(Events.enable_update, False)
         self.event(Events.updating, h1("en cours").italic.white)
 
-        infos = self.infos
-        rwrd = self.config.reward.pts
-        x_reward = f"//td[@class='rowfollow']/text()[.='{rwrd:,}']/following::input[1]"
-        x_reward_done = "//*[contains(text(), 'Toutes nos félicitations!')]"
-        x_infos = (
-            "(//span[@class='medium'])[1]",  # infos_txt
-            "//a[@href='messages.php']/..",  # mailbox_txt
-            "(//td[@class='text'])[2]",  # attendance_txt
-        )
-        x_infos_block = "//table[@id='info_block']"
-        x_rules = "//td[@class='embedded']/ul"
-
-        with Chrome(**self.chrome_kw) as driver:
-            driver.load_cookies(self.url)
-            with infos.updater(datetime.now()) as infos_updater:
-
-                def goto_page(page):
-                    return driver.get(f"{self.url}/{page}")
-
-                def update_infos():
-                    goto_page("attendance.php")
-                    driver.wait_for_clickable(x_infos_block)
-                    return infos_updater(*(driver.xpath(x).text for x in x_infos))
-
-                # bonus ?
-                if update_infos():
-                    self.log(h0("Bonus du jour obtenu !!").green)
-                    bonus_rules = driver.xpath(x_rules).text
-                    if infos.check_config_bonus(bonus_rules):
-                        self.log(h0("MàJ des règles Bonus !!").underline.red)
-                    update_infos()
-                else:
-                    self.log(Style("Bonus déjà obtenu aujourd'hui").green)
-
-                # reward ?
-                if infos.bonus >= rwrd:
-                    self.log(h0("Cadeau obtenu !!").underline.green)
-                    goto_page("mybonus.php")
-                    driver.wait_for_clickable(x_reward).click()
-                    driver.wait_for_clickable(x_reward_done)
-                    update_infos()
-
-            self.show_infos()
+        start, start_date = time.perf_counter(), datetime.now()
+        result = self.worker.update(self.config, self.url, self.chrome_kw, self.budget)
+        if result.infos:
+            self.infos.infos = result.infos
+        if result.stats:
+            self.log(h1("Profil de la MàJ: ").red, grey(result.stats))
+        if result.config_bonus:
+            # saved here, the config watcher doesn't see it as a change
+            self.infos.set_config_bonus(result.config_bonus)
+        self.show_infos()
 
         self.event(Events.enable_update, True)
+        self.updating = False
+
+        metrics = self.metrics
+        metrics["updates"] += 1
+        metrics["errors"] += bool(result.error)
+        metrics["last_duration"] = round(time.perf_counter() - start, 2)
+        metrics["worker_mb"] = round(self.worker.rss / MB)
+        metrics["chrome_peak_mb"] = round(self.worker.chrome_peak / MB)
+        if self.worker.launch_duration is not None:
+            metrics["launches"].append(round(self.worker.launch_duration, 2))
+        if result.error:
+            self.last_error = dict(vars(result.error), date=datetime.now())
+            outcome = "error"
+        else:
+            infos = self.infos.infos
+            outcome = "bonus" if infos.date == infos.bonus_date else "already"
+        self.runs.add(start_date, metrics["last_duration"], outcome)
 
-        self.error = bool(driver.error)
+        self.error = bool(result.error)
         self.event(Events.set_tray_icon, self.error)
         if self.error:
-            self.log_error(driver.error)
+            self.log_error(result.error)
             return self.retry  # schedule a retry
         return None
@@ -0,0 +1,169 @@
+from types import SimpleNamespace
+
+from tools.clock import Clock
+from tools.memory import MB, PeakRss
+from tools.style import Style
+
+from .events import Events, log_txts
+from .infos import InfosHandler
+from .site import SiteProfile
+
+h0 = Style().bigger().bold
+
+
+class Updater:
+    """the browser side of an update, meant to run in the worker process"""
+
+    def __init__(self, config, event_callback, archive=None, acquire=None, clock=None):
+        """
+        archive: Archive of the fetched pages
+        acquire: waits for the request budget before each page load
+        clock: dates the updates, a VirtualClock in the Simulator
+        """
+        self.config = config
+        self.event = event_callback
+        self.archive = archive
+        self.acquire = acquire or (lambda: None)
+        self.clock = clock or Clock()
+        self.infos = InfosHandler(config)
+        self.site = SiteProfile(config.site)
+        self.launch_duration = None
+        self.chrome_peak = 0  # rss
+        self.config_bonus = None  # new bonus rules, saved by the main process
+
+    def log(self, *txts, main=False):
+        self.event(Events.log, log_txts(*txts, main=main))
+
+    def chrome(self, chrome_kw):
+        # selenium & co are only imported once a Chrome is launched
+        # pylint: disable=import-outside-toplevel
+        from tools.chrome import Chrome
+
+        return Chrome(log=self.log, archive=self.archive, **chrome_kw)
+
+    def prewarm(self, url, chrome_kw):
+        """Chrome with its cookies checked, None if it failed"""
+        driver = self.chrome(chrome_kw)
+        try:
+            driver.load_cookies(url)
+        except Exception:  # pylint: disable=broad-except
+            driver.quit()
+            return None
+        return driver
+
+    def update(self, url, chrome_kw, driver=None):
+        """returns the driver error, driver: a prewarmed one or a fake"""
+        infos = self.infos
+        site = self.site
+
+        warm = driver is not None
+        if warm:
+            driver.log = self.log
+            driver.archive = self.archive
+        else:
+            driver = self.chrome(chrome_kw)
+        self.launch_duration = driver.launch_duration
+        with driver, PeakRss(driver.browser_pid) as chrome_rss:
+            if not warm:
+                driver.load_cookies(url)
+            loads = SimpleNamespace(pages=0, aside=0, fetches=0)
+            # attendance, then a mybonus & a failed re-read at most per claim
+            max_loads = 2 + 2 * self.config.reward.max_claims
+            update_date = self.clock.now()
+            with infos.updater(update_date) as infos_updater:
+
+                def goto_page(page):
+                    if loads.pages >= max_loads:
+                        raise RuntimeError(f"plus de {loads.pages} pages chargées")
+                    self.acquire()
+                    loads.pages += 1
+                    return driver.get(f"{url}/{site.pages[page]}")
+
+                def extract(page_source, page_url):
+                    if self.archive and self.archive.successes:
+                        self.archive.add(page_source, page_url)
+                    return site.extract(page_source)
+
+                def load_fields():
+                    goto_page("attendance")
+                    driver.wait_for_clickable(site.wait("infos_block"))
+                    # parse a single snapshot
+                    return extract(driver.page_source, driver.current_url)
+
+                def refresh_fields():
+                    """re-read attendance in place, a full load if it failed"""
+                    page_url = f"{url}/{site.pages['attendance']}"
+                    self.acquire()
+                    if (page_source := driver.fetch(page_url)) is None:
+                        return load_fields()
+                    loads.fetches += 1
+                    return extract(page_source, page_url)
+
+                # expired mybonus offers load in another tab meanwhile
+                offers_url = f"{url}/{site.pages['mybonus']}"
+                offers_page = None
+                if infos.offers_expired(update_date):
+                    self.acquire()
+                    offers_page = driver.load_aside(offers_url)
+
+                # bonus ?
+                if infos_updater(fields := load_fields()):
+                    self.log(h0("Bonus du jour obtenu !!").green)
+                    rules = fields.get("rules")
+                    if rules and (config_bonus := infos.new_config_bonus(rules)):
+                        # used by this update, not saved in the worker
+                        self.config_bonus = self.config.bonus = config_bonus
+                        self.log(h0("MàJ des règles Bonus !!").underline.red)
+                    infos_updater(refresh_fields())
+                else:
+                    self.log(Style("Bonus déjà obtenu aujourd'hui").green)
+
+                if offers_page:
+                    try:
+                        (page_source,) = offers_page.result()
+                        loads.aside += 1
+                    except Exception:  # pylint: disable=broad-except
+                        # fetched in place instead
+                        self.acquire()
+                        if page_source := driver.fetch(offers_url):
+                            loads.fetches += 1
+                    if page_source:
+                        offers = site.offers(page_source)
+                        infos.set_offers(offers, update_date)
+                        if not offers:
+                            # archived to check the site profile against
+                            self.log(Style("Offres non reconnues").red)
+                            if self.archive:
+                                self.archive.add(page_source, offers_url, "NoOffers")
+
+                # rewards ? the plan with the most GB the bonus affords
+                claimed = []
+                for pts, gb in infos.claims():
+                    if loads.pages + 2 > max_loads:
+                        # the next claims wait for the next update
+                        self.log(Style(f"Pages: {loads.pages} chargées, fin").red)
+                        break
+                    bonus = infos.bonus
+                    goto_page("mybonus")
+                    driver.wait_for_clickable(site.wait("reward", pts=pts)).click()
+                    driver.wait_for_clickable(site.wait("reward_done"))
+                    claimed.append(gb)
+                    infos_updater(refresh_fields())
+                    if infos.bonus >= bonus:  # not spent
+                        break
+                if claimed:
+                    n = len(claimed)
+                    gift = "Cadeau obtenu" if n == 1 else f"{n} Cadeaux obtenus"
+                    self.log(h0(f"{gift}: {sum(claimed):g} GB !!").underline.green)
+
+            self.log(
+                Style(
+                    f"Pages chargées: {loads.pages}, en parallèle: {loads.aside}, "
+                    f"relues: {loads.fetches}"
+                ).grey
+            )
+
+        self.chrome_peak = chrome_rss.peak
+        if self.chrome_peak:
+            self.log(Style(f"Chrome: {round(self.chrome_peak / MB)} Mo max").grey)
+        return driver.error
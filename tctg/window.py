@@ -0,0 +1,202 @@
+from collections import deque
+
+import PySimpleGUI as sg
+from psgtray import SystemTray
+from tools import img_to64, widgets
+
+from .events import Events
+from .tctg import TCTG
+
+
+class TCTGWindow(widgets.Window):
+    logo = img_to64("icons/logo.ico", height=22)
+    ok_ico = img_to64("icons/logo.ico")
+    error_ico = img_to64("icons/error.ico")
+
+    def __init__(self, app, config, worker=None):
+        font = config.UI.font
+        font_bold = f"{font} bold"
+
+        self.tray = SystemTray(
+            ["", []],
+            window=self,
+            single_click_events=True,
+            icon=TCTGWindow.ok_ico,
+        )
+        Events.tray_click = self.tray.key
+
+        self.logs = widgets.MLineColors(
+            font=(font, 8),
+            background_color=config.UI.log,
+            sbar_background_color=sg.theme_background_color(),
+            sbar_arrow_color=sg.theme_button_color_background(),
+            border_width=0,
+            auto_refresh=False,
+            write_only=True,
+            disabled=True,
+            expand_x=True,
+            expand_y=True,
+        )
+        self.b_update = widgets.ButtonMouseOver(
+            "MàJ",
+            font=(font_bold, 10),
+            k=Events.update,
+        )
+        self.left = widgets.AnimatedTxt(
+            "",
+            font=(font, 10),
+            colors=vars(config.UI.infos),
+            size=(20, None),
+        )
+        self.infos = widgets.MLineAutoSize(
+            "",
+            font=(font, 9),
+            justification="center",
+            background_color=sg.theme_background_color(),
+            text_color=sg.theme_element_text_color(),
+            pad=(5, 2),
+            colors=vars(config.UI.infos),
+        )
+        b_logo = widgets.ButtonCooldown(
+            "",
+            image_data=TCTGWindow.logo,
+            cooldown=2000,
+            button_color=sg.theme_background_color(),
+            over_color=sg.theme_button_color_background(),
+            border_width=0,
+            k=Events.logo,
+        )
+        b_quit = widgets.ButtonMouseOver(
+            "Quitter",
+            font=(font, 10),
+            over_color="red",
+            k=Events.close,
+        )
+        b_minimize = widgets.ButtonMouseOver(
+            "_____",
+            over_color="lime green",
+            font=(font_bold, 12),
+            k=Events.minimize,
+        )
+        self.yes_no_kw = dict(
+            title=f"Quitter {config.title} ?",
+            yes=("oui", "red"),
+            no=("non", "lime green"),
+            font=(font_bold, 12),
+        )
+
+        event_to_action = {
+            Events.tray_click: lambda _: self.UnHide() if self._Hidden else self.Hide(),
+            Events.enable_update: lambda enabled: self.b_update(disabled=not enabled),
+            Events.updating: lambda txt: self.set_left(txt, animated=True),
+            Events.logo: lambda _: self.tctg.open_in_browser(),
+            Events.update: lambda _: self.tctg.force_update(),
+            Events.set_tray_icon: self.set_tray_icon,
+            Events.close: lambda _: self.ask_close(),
+            Events.unhide: lambda _: self.UnHide(),
+            Events.minimize: lambda _: self.Hide(),
+            Events.show_infos: self.show_infos,
+            Events.log_left: self.set_left,
+            Events.log: self.log,
+            Events.profiling: self.set_profiling,
+        }
+
+        menu = [b_logo, b_quit, self.b_update, self.left, sg.P(), b_minimize]
+        super().__init__(
+            config.title,
+            [[self.infos, sg.Col([menu, [self.logs]], expand_y=True)]],
+            event_to_action=event_to_action,
+            element_padding=(2, 2),
+            alpha_channel=0,
+        )
+        app.set_callback_another_started(lambda: self.write_event_value(Events.unhide))
+
+        # buffered while hidden
+        self.hidden_logs = deque(maxlen=config.UI.hidden_logs)
+        self.hidden_infos = None
+        self.hidden_left = None
+        self.appeared = False
+        self.actions = event_to_action
+        self.tctg = TCTG(config, self.write_event_value, worker)
+
+    # pylint: disable=invalid-name
+    def Hide(self):
+        super().Hide()
+        self.left.suspend()
+        self.tctg.visible = False
+
+    def UnHide(self):
+        super().UnHide()
+        self.tctg.visible = True
+        self.flush()
+
+    def flush(self):
+        """render in one pass what's been buffered while hidden"""
+        while self.hidden_logs:
+            self.logs.print(*self.hidden_logs.popleft())
+        if self.hidden_left:
+            txt, animated = self.hidden_left
+            self.left(txt, animated=animated)
+            self.hidden_left = None
+        if self.hidden_infos:
+            self.render_infos(self.hidden_infos)
+            self.hidden_infos = None
+
+    def set_profiling(self, profiler):
+        """wrap the event dispatches, or restore them"""
+        if profiler:
+            slow_ms = self.tctg.config.profiling.slow_event_ms
+            self.event_to_action = {
+                event: profiler.wrap(
+                    getattr(event, "name", "tray"), action, slow_ms, self.tctg.log_slow
+                )
+                for event, action in self.actions.items()
+            }
+        else:
+            self.event_to_action = self.actions
+
+    def set_tray_icon(self, error):
+        self.tray.change_icon(TCTGWindow.error_ico if error else TCTGWindow.ok_ico)
+        if error:
+            self.UnHide()
+
+    def log(self, txts):
+        print(*txts, sep="")
+        if self._Hidden:
+            self.hidden_logs.append(txts)
+        else:
+            self.logs.print(*txts)
+
+    def set_left(self, txt, animated=False):
+        if self._Hidden:
+            self.hidden_left = txt, animated
+        else:
+            self.left(txt, animated=animated)
+
+    def show_infos(self, rows):
+        self.tray.set_tooltip("\n".join("".join(row) for row in rows.values())[:128])
+        if self._Hidden:
+            self.hidden_infos = rows
+        else:
+            self.render_infos(rows)
+
+    def render_infos(self, rows):
+        # only a resize needs a refresh of the whole layout
+        if self.infos.update(rows):
+            self.refresh()
+        if not self.appeared:
+            self.appeared = True
+            self.reappear()
+
+    def ask_close(self):
+        self.Hide()
+        if widgets.YesNoWindow(**self.yes_no_kw).loop():
+            return True
+        self.UnHide()
+        return False
+
+    def loop(self):
+        super().loop()
+        self.tctg.stop()
+        self.tray.close()
+        self.close()
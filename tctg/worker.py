@@ -0,0 +1,311 @@
+import multiprocessing
+import os
+from types import SimpleNamespace
+
+import psutil
+
+from tools.config import LoaderConfig
+
+from .events import Events
+
+
+def site_url(config):
+    return f"https://{config.domain}"
+
+
+def chrome_kw(config):
+    return dict(
+        page_load_timeout=config.timeouts.page_load,
+        wait_elt_timeout=config.timeouts.wait_elt,
+        profile_folder=config.profile.folder,
+        attach=config.attach,
+        **vars(config.chrome),
+    )
+
+
+def _error(err):
+    """where err was raised, like Chrome.error"""
+    tb = err.__traceback__
+    while tb.tb_next:
+        tb = tb.tb_next
+    return SimpleNamespace(
+        name=type(err).__name__,
+        file=os.path.basename(tb.tb_frame.f_code.co_filename),
+        line=tb.tb_lineno,
+    )
+
+
+def _crash_error():
+    return SimpleNamespace(name="WorkerCrash", file=os.path.basename(__file__), line=0)
+
+
+def _done(
+    error,
+    infos=None,
+    rss=0,
+    launch_duration=None,
+    chrome_peak=0,
+    config_bonus=None,
+    stats=None,
+):
+    """the update reply"""
+    return "done", dict(
+        error=error,
+        infos=infos,
+        rss=rss,
+        launch_duration=launch_duration,
+        chrome_peak=chrome_peak,
+        config_bonus=config_bonus,
+        stats=stats,
+    )
+
+
+def _work(conn):
+    """worker process loop"""
+    # selenium & co are only imported in the worker process
+    # pylint: disable=import-outside-toplevel
+    from tools.archive import Archive
+    from tools.profiling import Profiler
+
+    from .events import log_txts
+    from .updater import Updater
+
+    def event(key, value=None):
+        conn.send(("event", key.name, value))
+
+    def acquire():
+        """the request budget is shared in the main process"""
+        conn.send(("acquire",))
+        conn.recv()  # granted
+
+    # prewarmed Chrome for the update with the same (url, chrome_kw)
+    warm, warm_for = None, None
+    # written in the background, flushed when quitting
+    archive = None
+
+    def cancel():
+        nonlocal warm
+        if warm:
+            warm.quit()
+            warm = None
+
+    while True:
+        try:
+            msg, *args = conn.recv()
+        except EOFError:
+            msg = "quit"
+
+        if msg == "quit":
+            cancel()
+            if archive:
+                archive.close()
+            break
+
+        if msg == "cancel":
+            cancel()
+            conn.send(("warm", False))
+            continue
+
+        filename, config, url, chrome_kw = args
+        try:
+            archive = archive or Archive(**vars(config.archive))
+            updater = Updater(LoaderConfig(filename, config), event, archive, acquire)
+        except Exception as err:  # pylint: disable=broad-except
+            error = _error(err)
+            if msg == "update":
+                conn.send(_done(error))
+            else:
+                event(Events.log, log_txts(f"Préchauffage impossible: {error.name}"))
+                conn.send(("warm", False))
+            continue
+
+        # an update sent meanwhile waits for the prewarm, then uses its Chrome
+        if msg == "prewarm":
+            if warm_for != (url, chrome_kw):
+                cancel()
+            if not warm:
+                try:
+                    warm = updater.prewarm(url, chrome_kw)
+                except Exception:  # pylint: disable=broad-except
+                    warm = None  # launched cold by the update
+                warm_for = url, chrome_kw
+            conn.send(("warm", warm is not None))
+            continue
+
+        # the update quits the driver
+        driver = warm if warm_for == (url, chrome_kw) else None
+        if not driver:
+            cancel()
+        warm = None
+
+        # the parsing & Chrome driving are profiled here, not the pipe wait
+        update, profiler = updater.update, None
+        if (profiling := config.profiling).enabled:
+            profiler = Profiler(
+                profiling.folder,
+                profiling.keep,
+                profiling.cprofile,
+                profiling.tracemalloc,
+            )
+            profiler.start()
+            update = profiler.wrap("update", update)
+        error = update(url, chrome_kw, driver)
+        stats = None
+        if profiler:
+            profiler.stop()
+            stats = profiler.saved
+
+        done = _done(
+            error,
+            infos=updater.infos.infos,
+            rss=psutil.Process().memory_info().rss,
+            launch_duration=updater.launch_duration,
+            chrome_peak=updater.chrome_peak,
+            config_bonus=updater.config_bonus,
+            stats=stats,
+        )
+        conn.send(done)
+
+
+class Worker:
+    """
+    run the updates in a spawned process that talks back with Events,
+    recycled after some updates or above a memory threshold
+    """
+
+    def __init__(
+        self, event_callback=None, recycle_after_updates=1, recycle_above_mb=300
+    ):
+        """event_callback might be set later, eg when prewarmed at launch"""
+        self.event = event_callback
+        self.recycle_after_updates = recycle_after_updates
+        self.recycle_above = recycle_above_mb * 2**20
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._updates = 0
+        self._warm = False  # the last prewarm reply
+        self._replies = 0  # prewarm & cancel replies awaited
+        self.rss = 0  # of the last update
+        self.chrome_peak = 0  # rss of the Chrome processes during the last update
+        self.launch_duration = None  # of the last Chrome
+
+    def _start(self):
+        self._conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_work, args=(child_conn,), daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        self._updates = 0
+
+    def stop(self):
+        if self._process:
+            try:
+                self._conn.send(("quit",))
+            except OSError:
+                pass
+            self._process.join(5)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._conn.close()
+            self._process = None
+        self._warm, self._replies = False, 0
+
+    def _handle(self, msg, *args):
+        """the events & prewarm replies"""
+        if msg == "event":
+            key, value = args
+            if self.event:
+                self.event(Events[key], value)
+        elif msg == "warm":
+            self._replies -= 1
+            (self._warm,) = args
+
+    @property
+    def warm(self):
+        """
+        a Chrome is prewarmed, or still prewarming or quitting, as replied
+        by the worker, read in the thread that sends the updates
+        """
+        try:
+            while self._process and self._conn.poll():
+                self._handle(*self._conn.recv())
+        except (EOFError, OSError):
+            self.stop()  # restarted by the next update
+        return self._warm or self._replies > 0
+
+    def _send(self, msg):
+        """sent, replied with a warm message"""
+        try:
+            self._conn.send(msg)
+            self._replies += 1
+        except OSError:
+            self.stop()
+
+    def prewarm(self, config, url, chrome_kw):
+        """launch Chrome ahead for the next update, doesn't wait"""
+        if not self._process:
+            self._start()
+        self._send(("prewarm", config.filename, config.snapshot(), url, chrome_kw))
+
+    def cancel(self):
+        """quit the prewarmed Chrome, if any"""
+        if self._process:
+            self._send(("cancel",))
+
+    def _crashed(self):
+        """restarted for the next update"""
+        self.stop()
+        self._start()
+        return SimpleNamespace(
+            infos=None, error=_crash_error(), config_bonus=None, stats=None
+        )
+
+    def update(self, config, url, chrome_kw, budget=None):
+        """
+        returns SimpleNamespace(infos, error, config_bonus, stats), infos is None
+        on a crash, config_bonus: the new bonus rules to save, stats: the
+        profiling stats path, budget: TokenBucket of the page loads,
+        waits for a prewarm in progress
+        """
+        if not self._process:
+            self._start()
+
+        reply = "update", config.filename, config.snapshot(), url, chrome_kw
+        while True:
+            try:
+                # the worker might have died while idle or prewarming
+                if reply:
+                    self._conn.send(reply)
+                    reply = None
+                msg, *args = self._conn.recv()
+            except (EOFError, OSError):
+                return self._crashed()
+
+            if msg in ("event", "warm"):
+                self._handle(msg, *args)
+
+            elif msg == "acquire":
+                if budget:
+                    budget.acquire()
+                reply = ("granted",)
+
+            elif msg == "done":
+                (done,) = args
+                self.rss = done["rss"]
+                self.launch_duration = done["launch_duration"]
+                self.chrome_peak = done["chrome_peak"]
+                self._warm = False  # used by the update
+                self._updates += 1
+                if (
+                    self._updates >= self.recycle_after_updates
+                    or self.rss >= self.recycle_above
+                ):
+                    self.stop()
+                return SimpleNamespace(
+                    infos=done["infos"],
+                    error=done["error"],
+                    config_bonus=done["config_bonus"],
+                    stats=done["stats"],
+                )
@@ -0,0 +1,149 @@
+"""a local stand-in of the tracker for the load tests, not shipped"""
+
+import random
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from tctg.simulator import SimulatedDriver, SimulatedSite
+
+COOKIE = "c_secure_uid"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "TCTGStandIn/1.0"
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    def _send(self, code, html, cookie=None):
+        body = html.encode("utf8")
+        self.send_response(code)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if cookie:
+            self.send_header("Set-Cookie", cookie)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _account(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        if COOKIE in cookie:
+            return cookie[COOKIE].value
+        return None if self.server.check_cookies else "0"
+
+    def _route(self, method):
+        server = self.server
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        page = url.path.strip("/") or "index.php"
+        server.count(page)
+
+        if server.latency:
+            time.sleep(server.latency * server.rnd.uniform(0.5, 1.5))
+        if server.rnd.random() < server.failure_rate:
+            return self._send(500, "<html><body>Erreur serveur</body></html>")
+
+        if page == "takelogin.php":
+            uid = query.get("uid", "0")
+            cookie = f"{COOKIE}={uid}; Path=/; Max-Age=31536000"
+            return self._send(200, "<html><body>Connecté</body></html>", cookie)
+
+        if (account := self._account()) is None:
+            return self._send(403, "<html><body>Connexion requise</body></html>")
+
+        with server.lock:
+            html = server.render(account, page, method, query)
+        return self._send(200 if html else 404, html or "<html>404</html>")
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self._route("GET")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self._route("POST")
+
+
+class SiteServer(ThreadingHTTPServer):
+    """
+    local stand-in of the tracker serving attendance.php, mybonus.php
+    & messages.php for simulated accounts, with configurable latency,
+    failures & cookie check
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        config,
+        port=0,
+        latency=0,
+        failure_rate=0,
+        check_cookies=True,
+        seed=0,
+        **site_kw,
+    ):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.config = config
+        self.latency = latency  # seconds
+        self.failure_rate = failure_rate
+        self.check_cookies = check_cookies
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sites = {}
+        self.hits = {}
+        self._site_kw = site_kw
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def domain(self):
+        return f"127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def url(self):
+        return f"http://{self.domain}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        self.server_close()
+
+    def count(self, page):
+        with self.lock:
+            self.hits[page] = self.hits.get(page, 0) + 1
+
+    def site(self, account):
+        if account not in self.sites:
+            rnd = random.Random(f"{account}")
+            self.sites[account] = SimulatedSite(self.config, rnd, **self._site_kw)
+        return self.sites[account]
+
+    def render(self, account, page, method, query):
+        return self.site(account).render(page, datetime.now(), method, query)
+
+
+class HttpDriver(SimulatedDriver):
+    """the Updater driver of a SiteServer account over plain http, no browser"""
+
+    def __init__(self, account, timeout=10):
+        super().__init__(site=None, clock=None)
+        self.timeout = timeout
+        self._opener = urllib.request.build_opener()
+        self._opener.addheaders = [("Cookie", f"{COOKIE}={account}")]
+
+    def _render(self, url, method="GET"):
+        data = b"" if method == "POST" else None
+        with self._opener.open(url, data, self.timeout) as response:
+            return response.read().decode("utf8")
+
+    def fetch(self, url):
+        try:
+            return self._render(url)
+        except OSError:
+            return None
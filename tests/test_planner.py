@@ -0,0 +1,40 @@
+import os
+from datetime import datetime, timedelta
+
+from tctg.bonus import Bonuses
+from tctg.infos import Infos
+from tctg.planner import reward_eta
+from tools.loader import Loader
+
+CONFIG = os.path.join(os.path.dirname(__file__), "fixtures", "config.yaml")
+
+
+def _infos(speeds, hours=1):
+    """a day of bonuses seeded at each of the speeds (pts/day) in turn"""
+    infos, bonus, date = Infos(bonuses=Bonuses()), 0, datetime(2022, 1, 1)
+    for i in range(24 // hours + 1):
+        infos.bonuses.add(date=date, bonus=bonus, dbonus=0)
+        bonus += speeds[i % len(speeds)] * hours / 24
+        date += timedelta(hours=hours)
+    return infos
+
+
+def test_constant_speed():
+    config = Loader(CONFIG).load()
+    config.planner.miss_day_percent = 100  # seeding only
+    low, high = reward_eta(_infos([240]), config, [2400])[0]
+    assert low == high == 10
+
+
+def test_resampled_speeds_spread():
+    config = Loader(CONFIG).load()
+    config.planner.miss_day_percent = 100
+    low, high = reward_eta(_infos([0, 480]), config, [2400])[0]
+    assert low < 10 < high
+
+
+def test_no_history_uses_the_speed():
+    config = Loader(CONFIG).load()
+    config.planner.miss_day_percent = 100
+    infos = Infos(bonuses=Bonuses(), speed=240)
+    assert list(reward_eta(infos, config, [2400])[0]) == [10, 10]
@@ -0,0 +1,37 @@
+import os
+from datetime import datetime, timedelta
+
+from tools.profile import MB, Profile
+
+NOW = datetime(2022, 1, 1)
+
+
+def _write(folder, relpath, size):
+    path = os.path.join(folder, relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"0" * size)
+
+
+def test_caches_purged_on_their_own(tmp_path):
+    folder = str(tmp_path)
+    _write(folder, os.path.join("Default", "Cache", "data_0"), MB)
+    _write(folder, os.path.join("Default", "Cookies"), 1000)
+    profile = Profile(folder, max_mb=200, check_every_hours=6)
+
+    maintained = profile.maintain(NOW)
+    assert (maintained.purged_size, maintained.compacted_size) == (MB, None)
+    assert maintained.size == 1000
+
+    # below max_mb, only the caches every purge_caches_every_hours
+    _write(folder, os.path.join("Default", "Cache", "data_0"), MB)
+    assert profile.maintain(NOW + timedelta(hours=7)).purged_size is None
+    assert profile.maintain(NOW + timedelta(hours=25)).purged_size == MB
+
+
+def test_set_keeps_the_next_checks(tmp_path):
+    profile = Profile(str(tmp_path), check_every_hours=6)
+    assert profile.maintain(NOW)
+    profile.set(str(tmp_path), 100, 12, 24)
+    assert profile.maintain(NOW + timedelta(hours=1)) is None
+    assert profile.max_size == 100 * MB
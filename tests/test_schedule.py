@@ -0,0 +1,73 @@
+import random
+from datetime import datetime, timedelta
+from itertools import islice
+
+from tools.clock import VirtualClock
+from tools.schedule import Duration, Schedule
+
+DAY = datetime(2022, 1, 10)
+
+
+def _daily(at, jitter_minutes, add=True):
+    every = Duration(1, rnd=random.Random(0)).days.at(at)
+    return every.jitter(jitter_minutes, add=add).minutes
+
+
+def test_first_at_the_window_start():
+    # ±30 minutes window 11h30-12h30, still possible at its start only
+    every = _daily("12:00", 30, add=False)
+    assert every._first(DAY.replace(hour=11, minute=30)) == DAY.replace(hour=12)
+    late = DAY.replace(hour=11, minute=30, second=1)
+    assert every._first(late) == DAY.replace(hour=12) + timedelta(days=1)
+
+
+def test_first_across_midnight():
+    # ±30 minutes around midnight, the window starts the day before
+    every = _daily("00:00", 30, add=False)
+    assert every._first(DAY - timedelta(minutes=31)) == DAY
+    assert every._first(DAY - timedelta(minutes=29)) == DAY + timedelta(days=1)
+
+
+def test_first_after_a_long_sleep():
+    every = _daily("12:00", 60)
+    now = DAY + timedelta(days=1000, hours=13, minutes=1)
+    assert every._first(now) == DAY + timedelta(days=1001, hours=12)
+
+
+def test_next_from_keeps_a_date_to_come():
+    every = _daily("23:30", 60).from_now(DAY)
+    date = every.date
+    assert (
+        DAY.replace(hour=23, minute=30)
+        <= date
+        <= DAY.replace(hour=23) + timedelta(hours=1, minutes=30)
+    )
+    assert every.next_from(date - timedelta(seconds=1)).date == date
+    # passed, in the next window past midnight
+    assert every.next_from(date).date >= date + timedelta(hours=23)
+
+
+def test_windows_from_the_one_in_progress():
+    every = _daily("23:30", 60)
+    now = DAY + timedelta(minutes=10)  # in the 23h30-00h30 window of the day before
+    windows = list(islice(every.windows(now), 2))
+    assert windows == [
+        (DAY - timedelta(minutes=30), DAY + timedelta(minutes=30)),
+        (DAY + timedelta(hours=23, minutes=30), DAY + timedelta(days=1, minutes=30)),
+    ]
+    # over, the next one first
+    now = DAY + timedelta(minutes=31)
+    assert next(every.windows(now))[0] == DAY + timedelta(hours=23, minutes=30)
+
+
+def test_plan_labels_the_windows():
+    schedule = Schedule(lambda: None, clock=VirtualClock(DAY), rnd=random.Random(0))
+    night = schedule.every(1).days.at("00:00").jitter_add(60).minutes
+    noon = schedule.every(1).days.at("11:00").jitter_add(120).minutes
+    plan = schedule.plan(4, now=DAY + timedelta(minutes=30))
+    assert [(start.day, start.hour, every) for start, _, every in plan] == [
+        (10, 0, night),
+        (10, 11, noon),
+        (11, 0, night),
+        (11, 11, noon),
+    ]
@@ -0,0 +1,37 @@
+import os
+
+from tctg.simulator import Simulator
+
+# frozen, the simulated numbers don't follow the user's config.yaml
+CONFIG = os.path.join(os.path.dirname(__file__), "fixtures", "config.yaml")
+
+
+def _stats(stats):
+    return dict(vars(stats), log=len(stats.log))
+
+
+def _run(days, seed=0):
+    with Simulator.from_file(CONFIG, seed=seed) as simulator:
+        return _stats(simulator.run(days))
+
+
+def test_a_seeded_year():
+    stats = _run(365)
+    assert stats["updates"] == 774
+    assert stats["forced"] == 1  # update_at_start
+    assert stats["errors"] == 43
+    assert stats["bonuses"] == 365
+    assert stats["rewards"] == 28
+    assert stats["gb"] == 1400
+
+
+def test_seeded_runs_are_reproducible():
+    assert _run(60, seed=1) == _run(60, seed=1)
+
+
+def test_runs_go_on():
+    with Simulator.from_file(CONFIG, seed=1) as simulator:
+        first = _stats(simulator.run(30))
+        second = _stats(simulator.run(30))
+    assert second["bonuses"] == 60 > first["bonuses"]
+    assert not os.path.exists(simulator.config.infos_file)
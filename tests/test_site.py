@@ -0,0 +1,62 @@
+"""
+the mybonus fixture follows the NexusPHP template, the offers parsing is
+unverified on the site till an archived NoOffers page replaces it
+"""
+
+import os
+from datetime import datetime
+
+from lxml import html
+
+from tctg.infos import InfosHandler
+from tctg.site import SiteProfile
+from tools.loader import Loader
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+MYBONUS = "mybonus_nexusphp.html"
+
+
+def _page(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf8") as f:
+        return f.read()
+
+
+def test_offers():
+    profile = SiteProfile("sites/tctg.yaml")
+    offers = profile.offers(_page(MYBONUS))
+    # only the upload offers, not the invite, title, VIP nor gift ones
+    assert offers == [[1500, 1.0], [10000, 15.0], [25000, 50.0], [60000, 110.0]]
+
+
+def test_reward_button():
+    profile = SiteProfile("sites/tctg.yaml")
+    root = html.fromstring(_page(MYBONUS))
+    for pts, _ in profile.offers(_page(MYBONUS)):
+        (button,) = root.xpath(profile.wait("reward", pts=pts))
+        assert button.get("type") == "submit"
+        assert button.get("disabled") is None
+
+
+def test_infos():
+    profile = SiteProfile("sites/tctg.yaml")
+    fields = profile.extract(_page(MYBONUS))
+    assert fields["bonus"] == 61874.3
+    assert fields["dbonus"] == 48
+    assert fields["ul"] == (1.502, "TB")
+    assert fields["seeding"] == 37
+    assert fields["connected"] is True
+    assert fields["n_messages"] == 0
+
+
+def test_no_offer_falls_back_to_config_reward(tmp_path):
+    config = Loader(os.path.join(FIXTURES, "config.yaml")).load()
+    config.infos_file = str(tmp_path / "infos.yaml")
+    infos = InfosHandler(config)
+    infos.set_offers([[10000, 15.0]], datetime(2022, 1, 1))
+
+    profile = SiteProfile("sites/tctg.yaml")
+    offers = profile.offers("<html><body>Site en maintenance</body></html>")
+    assert offers == []
+    infos.set_offers(offers, datetime(2022, 1, 2))
+    infos.infos.bonus = config.reward.pts
+    assert infos.claims() == [(config.reward.pts, config.reward.gb)]
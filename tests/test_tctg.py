@@ -0,0 +1,66 @@
+import shutil
+import threading
+import time
+
+import pytest
+
+from tctg.tctg import TCTG
+from tools.config import Config, LoaderConfig
+from tools.loader import Loader
+
+FIXTURE = "tests/fixtures/config.yaml"
+
+
+@pytest.fixture
+def tctg(tmp_path):
+    filename = tmp_path / "config.yaml"
+    shutil.copy(FIXTURE, filename)
+    # no update, prewarm nor control port collision
+    config = LoaderConfig(str(filename))
+    config.update_at_start = False
+    config.prewarm.before_seconds = 0
+    config.control.port = 0
+    config.control.token = "test"
+    config.infos_file = str(tmp_path / "infos.yaml")
+    config.save()
+
+    invalid = threading.Event()
+
+    def event(key, value=None):
+        if key.name == "log" and "Config invalide" in "".join(map(str, value)):
+            invalid.set()
+
+    tctg = TCTG(config, event)
+    tctg.invalid = invalid
+    yield tctg
+    tctg.stop()
+
+
+@pytest.mark.parametrize("everyday", [[["25:00", 60]], []])
+def test_reload_an_invalid_everyday(tctg, everyday):
+    loader = Loader(tctg.config.filename)
+    config = loader.load()
+    old_everyday, config.everyday = config.everyday, everyday
+    loader.save(config)
+
+    # reloaded by the schedule idle hook
+    assert tctg.invalid.wait(5)
+    assert tctg.schedule._run.is_alive()  # pylint: disable=protected-access
+    assert tctg.config.everyday == old_everyday
+    assert len(tctg.everys) == len(old_everyday)
+
+
+def test_reload_a_domain_budget(tctg):
+    loader = Loader(tctg.config.filename)
+    config = loader.load()
+    budget = Config(per_minute=6, burst=1, jitter_seconds=0)
+    setattr(config.budget, config.domain, budget)
+    loader.save(config)
+
+    # reloaded by the schedule idle hook
+    for _ in range(50):
+        if tctg.budget.rate == 6 / 60:
+            break
+        time.sleep(0.1)
+    assert (tctg.budget.rate, tctg.budget.burst) == (6 / 60, 1)
+    assert not tctg.invalid.is_set()
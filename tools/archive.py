@@ -0,0 +1,171 @@
+import atexit
+import hashlib
+import json
+import os
+import queue
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+
+MB = 2**20
+
+
+def _shas(entry):
+    return [sha for sha in (entry["page"], entry["trace"]) if sha]
+
+
+class Archive:
+    """
+    zlib compressed pages stored by their sha256, so deduplicated,
+    an index.jsonl line per snapshot (date, url, error, page & trace sha),
+    written by a background thread, capped in size & age
+    """
+
+    def __init__(self, folder="archive", successes=False, max_mb=100, max_days=90):
+        self.folder = folder
+        self.successes = successes  # errors are always archived
+        self.max_size = max_mb * MB
+        self.max_age = timedelta(days=max_days)
+        self._index_file = os.path.join(folder, "index.jsonl")
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._entries = None
+        self._size = 0
+
+    def _path(self, sha):
+        return os.path.join(self.folder, "pages", sha[:2], f"{sha}.z")
+
+    def _load_index(self):
+        entries = []
+        if os.path.exists(self._index_file):
+            with open(self._index_file, "r", encoding="utf8") as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+        sizes = {}
+        for sha in {sha for entry in entries for sha in _shas(entry)}:
+            try:
+                sizes[sha] = os.path.getsize(self._path(sha))
+            except FileNotFoundError:
+                pass  # removed by hand
+
+        # drop the stale entries & what's left of their files
+        self._entries = [
+            entry for entry in entries if all(sha in sizes for sha in _shas(entry))
+        ]
+        kept = {sha for entry in self._entries for sha in _shas(entry)}
+        for sha in sizes.keys() - kept:
+            self._remove(sha)
+        self._size = sum(sizes[sha] for sha in kept)
+        if len(self._entries) < len(entries):
+            self._write_index()
+
+    def _write_index(self):
+        with open(self._index_file, "w", encoding="utf8") as f:
+            f.writelines(f"{json.dumps(entry)}\n" for entry in self._entries)
+
+    def _remove(self, sha):
+        """the size freed, 0 if already gone"""
+        path = self._path(sha)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+        return size
+
+    def add(self, html, url, error=None, trace=None, date=None):
+        """queue a snapshot, error: the exception name, trace: its traceback"""
+        with self._lock:
+            if not self._thread:
+                self._thread = threading.Thread(target=self._write_loop, daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        self._queue.put((html, url, error, trace, date or datetime.now()))
+
+    def close(self):
+        """wait for the pending writes"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._queue.put(None)
+            thread.join()
+            atexit.unregister(self.close)
+
+    def _store(self, txt):
+        if txt is None:
+            return None
+        data = txt.encode("utf8")
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(zlib.compress(data))
+            self._size += os.path.getsize(path)
+        return sha
+
+    def _write_loop(self):
+        os.makedirs(self.folder, exist_ok=True)
+        with self._lock:
+            if self._entries is None:
+                self._load_index()
+        while (snapshot := self._queue.get()) is not None:
+            html, url, error, trace, date = snapshot
+            entry = dict(
+                date=date.isoformat(timespec="seconds"),
+                url=url,
+                error=error,
+                page=self._store(html),
+                trace=self._store(trace),
+            )
+            self._entries.append(entry)
+            with open(self._index_file, "a", encoding="utf8") as f:
+                f.write(f"{json.dumps(entry)}\n")
+            self._prune(date)
+
+    def _prune(self, now):
+        """remove the oldest snapshots beyond the age & size caps"""
+        oldest = (now - self.max_age).isoformat(timespec="seconds")
+        refs = Counter(sha for entry in self._entries for sha in _shas(entry))
+        n_pruned = 0
+        for entry in self._entries[:-1]:  # keep the last one
+            if entry["date"] >= oldest and self._size <= self.max_size:
+                break
+            n_pruned += 1
+            for sha in _shas(entry):
+                refs[sha] -= 1
+                if refs[sha] == 0:
+                    self._size -= self._remove(sha)
+
+        if n_pruned:
+            self._entries = self._entries[n_pruned:]
+            self._write_index()
+
+    def find(self, since=None, until=None, url=None, error=None):
+        """
+        index entries, since & until: datetime, url: a part of it,
+        error: the exception name or True for any error
+        """
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._load_index()
+        for entry in list(self._entries):
+            date = datetime.fromisoformat(entry["date"])
+            if (
+                (since is None or date >= since)
+                and (until is None or date <= until)
+                and (url is None or url in entry["url"])
+                and (
+                    error is None
+                    or entry["error"] == error
+                    or (error is True and entry["error"])
+                )
+            ):
+                yield entry
+
+    def load(self, sha):
+        """the text of a page or trace sha"""
+        with open(self._path(sha), "rb") as f:
+            return zlib.decompress(f.read()).decode("utf8")
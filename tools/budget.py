@@ -0,0 +1,85 @@
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    per_minute tokens refilled up to burst, acquire() reserves the next
+    token in FIFO order and waits for it, the throttled waits get a jitter
+    """
+
+    def __init__(
+        self, per_minute=20, burst=5, jitter_seconds=0, clock=None, sleep=None, rnd=None
+    ):
+        self.set(per_minute, burst, jitter_seconds)
+        self._clock = clock or time.monotonic
+        self._sleep = sleep or time.sleep
+        self._rnd = rnd or random
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._last = self._clock()
+        # counters
+        self.acquired = 0
+        self.throttled = 0
+        self.waited = 0.0  # seconds
+
+    def set(self, per_minute, burst, jitter_seconds=0):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.jitter = jitter_seconds
+
+    def _reserve(self):
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+            # might get negative, the debt is the queue
+            self._tokens -= 1
+            self.acquired += 1
+            if self._tokens >= 0:
+                return 0
+            wait = -self._tokens / self.rate + self._rnd.uniform(0, self.jitter)
+            self.throttled += 1
+            self.waited += wait
+            return wait
+
+    def acquire(self):
+        """returns the seconds waited"""
+        if wait := self._reserve():
+            self._sleep(wait)
+        return wait
+
+    def stats(self):
+        return dict(
+            acquired=self.acquired,
+            throttled=self.throttled,
+            waited=round(self.waited, 1),
+            mean_wait=round(self.waited / self.throttled, 1) if self.throttled else 0,
+        )
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket(key, **kwargs):
+    """
+    the TokenBucket shared by all the users of key in this process,
+    eg all the accounts hitting the same domain from the same IP
+    """
+    with _buckets_lock:
+        if key in _buckets:
+            if kwargs:
+                _buckets[key].set(**kwargs)
+        else:
+            _buckets[key] = TokenBucket(**kwargs)
+        return _buckets[key]
+
+
+def key_settings(budgets, key):
+    """the bucket() settings of key in budgets, a Config keyed by keys & default"""
+    budgets = vars(budgets)
+    return vars(budgets.get(key, budgets["default"]))
@@ -0,0 +1,165 @@
+import asyncio
+import itertools
+import json
+import urllib.request
+
+import websockets
+
+
+class CDPError(Exception):
+    pass
+
+
+def _get_json(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.load(response)
+
+
+class CDP:
+    """
+    asyncio client of a Chrome DevTools endpoint, the tabs are flat
+    sessions of the browser websocket & their events are awaited, not polled
+    """
+
+    def __init__(self, address):
+        """address: host:port of the Chrome remote debugging"""
+        self.address = address
+        self._ids = itertools.count(1)
+        self._results = {}  # message id: future
+        self._waiters = []  # (method, session, future)
+        self._ws = None
+        self._reader = None
+
+    async def __aenter__(self):
+        version = await asyncio.to_thread(
+            _get_json, f"http://{self.address}/json/version"
+        )
+        self._ws = await websockets.connect(
+            version["webSocketDebuggerUrl"], max_size=None
+        )
+        self._reader = asyncio.create_task(self._read_loop())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._reader.cancel()
+        await self._ws.close()
+
+    async def _read_loop(self):
+        try:
+            async for message in self._ws:
+                self._dispatch(json.loads(message))
+        finally:
+            # nothing more to come
+            for future in (*self._results.values(), *(w[2] for w in self._waiters)):
+                if not future.done():
+                    future.set_exception(CDPError("connexion fermée"))
+
+    def _dispatch(self, message):
+        if "id" in message:
+            if future := self._results.pop(message["id"], None):
+                if error := message.get("error"):
+                    future.set_exception(CDPError(error.get("message")))
+                else:
+                    future.set_result(message.get("result", {}))
+            return
+
+        method, session = message.get("method"), message.get("sessionId")
+        for waiter in list(self._waiters):
+            waited_method, waited_session, future = waiter
+            if future.done():  # cancelled or timed out
+                self._waiters.remove(waiter)
+            elif waited_method == method and waited_session == session:
+                self._waiters.remove(waiter)
+                future.set_result(message.get("params", {}))
+
+    async def send(self, method, session=None, **params):
+        """the command result"""
+        message_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._results[message_id] = future
+        message = dict(id=message_id, method=method, params=params)
+        if session:
+            message["sessionId"] = session
+        await self._ws.send(json.dumps(message))
+        return await future
+
+    def event(self, method, session=None):
+        """future of the next method event, get it before triggering it"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((method, session, future))
+        return future
+
+    async def new_context(self):
+        """a browser context with its own cookies, eg for another account"""
+        result = await self.send("Target.createBrowserContext")
+        return result["browserContextId"]
+
+    async def new_tab(self, context=None):
+        """a background Tab, in the default context if None"""
+        params = dict(url="about:blank", background=True)
+        if context:
+            params["browserContextId"] = context
+        target = (await self.send("Target.createTarget", **params))["targetId"]
+        result = await self.send("Target.attachToTarget", targetId=target, flatten=True)
+        tab = Tab(self, target, result["sessionId"])
+        await tab.send("Page.enable")
+        return tab
+
+
+class Tab:
+    """a page target driven through its CDP session"""
+
+    def __init__(self, cdp, target, session):
+        self.cdp = cdp
+        self.target = target
+        self.session = session
+
+    def send(self, method, **params):
+        return self.cdp.send(method, self.session, **params)
+
+    async def load(self, url, timeout=30):
+        """navigate & wait for the load event"""
+        loaded = self.cdp.event("Page.loadEventFired", self.session)
+        result = await self.send("Page.navigate", url=url)
+        if error := result.get("errorText"):
+            loaded.cancel()
+            raise CDPError(f"{url}: {error}")
+        await asyncio.wait_for(loaded, timeout)
+
+    async def evaluate(self, expression):
+        """the value of the expression, promises are awaited"""
+        result = await self.send(
+            "Runtime.evaluate",
+            expression=expression,
+            returnByValue=True,
+            awaitPromise=True,
+        )
+        if details := result.get("exceptionDetails"):
+            raise CDPError(details.get("text"))
+        return result["result"].get("value")
+
+    async def html(self):
+        return await self.evaluate("document.documentElement.outerHTML")
+
+    async def fetch(self, url):
+        """the html of a same origin url fetched in the page, None if failed"""
+        return await self.evaluate(
+            f"fetch({json.dumps(url)}, {{credentials: 'same-origin'}})"
+            ".then(r => r.ok ? r.text() : null).catch(() => null)"
+        )
+
+    async def set_cookie(self, url, name, value):
+        await self.send("Network.setCookie", url=url, name=name, value=value)
+
+    async def close(self):
+        await self.cdp.send("Target.closeTarget", targetId=self.target)
+
+
+async def load_html(cdp, url, timeout=30):
+    """the html of url loaded in a new tab of the CDP connection"""
+    tab = await cdp.new_tab()
+    try:
+        await tab.load(url, timeout)
+        return await tab.html()
+    finally:
+        await tab.close()
@@ -1,26 +1,36 @@
+import asyncio
 import os
-import shutil
 import time
 import traceback
+import urllib.request
 from datetime import datetime
+from threading import Thread
 from types import SimpleNamespace
 from urllib.parse import urlparse
 
 import undetected_chromedriver as uc
 from browser_cookie3 import chrome as chrome_cookies
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.webdriver import WebDriver as ChromeWebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
-from win32api import HIWORD, GetFileVersionInfo
 
 from . import timedelta_loc
+from .cdp import CDP, load_html
+from .driver import DriverCache
 from .style import Style
 
 
-def _get_chrome_main_version():
-    filename = uc.find_chrome_executable()
-    info = GetFileVersionInfo(filename, "\\")
-    return HIWORD(info["FileVersionMS"])
+def _is_listening(address, timeout=0.5):
+    """a DevTools endpoint on host:port ?"""
+    try:
+        url = f"http://{address}/json/version"
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status == 200
+    except OSError:
+        return False
 
 
 def _get_xpath_loc(xpath):
@@ -37,33 +47,122 @@ def _find(find_func, xpath):
 class Chrome(uc.Chrome):
     # faster load without images
     prefs = {"profile.managed_default_content_settings.images": 2}
+    # fewer processes & less memory, the profile & its cookies store are
+    # untouched, no --single-process that uc & recent Chrome don't survive
+    lean_args = (
+        "--disable-gpu",
+        "--disable-extensions",
+        "--disable-component-update",
+        "--disable-background-networking",
+        "--disable-default-apps",
+        "--disable-sync",
+        "--mute-audio",
+        "--disable-site-isolation-trials",
+        "--disable-features=site-per-process,IsolateOrigins,"
+        "Translate,MediaRouter,OptimizationHints",
+        "--renderer-process-limit=1",
+    )
     profile_folder = "profile"
-    error_folder = "error"
+    drivers = DriverCache()
+    # the html of a same origin url, null if failed
+    fetch_js = (
+        "return fetch(arguments[0], {credentials: 'same-origin'})"
+        ".then(r => r.ok ? r.text() : null).catch(() => null)"
+    )
 
-    def __init__(self, page_load_timeout=10, wait_elt_timeout=5, log=None):
-        options = uc.ChromeOptions()
-        options.headless = True
-        options.add_experimental_option("prefs", Chrome.prefs)
+    def __init__(
+        self,
+        page_load_timeout=10,
+        wait_elt_timeout=5,
+        log=None,
+        profile_folder=None,
+        archive=None,
+        attach=None,
+        lean=False,
+        js_heap_mb=None,
+    ):
+        """
+        archive: Archive of the error pages, else the traceback is printed
+        attach: host:port of a running Chrome remote debugging, a headless
+        Chrome is launched if nothing's listening there
+        lean: launched with lean_args, js_heap_mb: caps the JS heap
+        debugger_address: where tools.cdp.CDP connects to this Chrome
+        """
+        # read by uc.Chrome.__getattribute__ before its __init__ sets it
+        self.debug = False
+        # the asyncio loop thread & CDP connection of the pages loaded aside
+        self._aside_loop = self._aside_thread = self._cdp = None
         # pylint: disable=unnecessary-lambda
         self.error = None
         self.log = log or (lambda *args: print(*args))
+        self.archive = archive
 
         # profile to keep the caches & cookies
-        os.makedirs(Chrome.profile_folder, exist_ok=True)
+        self.profile_folder = profile_folder or Chrome.profile_folder
+        os.makedirs(self.profile_folder, exist_ok=True)
 
-        super().__init__(
-            options=options,
-            version_main=_get_chrome_main_version(),
-            user_data_dir=os.path.abspath(Chrome.profile_folder),
-        )
+        # cached chrome version & patched chromedriver
+        driver = Chrome.drivers.get()
+        start = time.perf_counter()
+        self.attached = bool(attach) and _is_listening(attach)
+        if self.attached:
+            self._attach(attach, os.path.abspath(driver.path))
+        else:
+            options = uc.ChromeOptions()
+            options.headless = True
+            options.add_experimental_option("prefs", Chrome.prefs)
+            if lean:
+                for arg in Chrome.lean_args:
+                    options.add_argument(arg)
+            if js_heap_mb:
+                options.add_argument(f"--js-flags=--max-old-space-size={js_heap_mb}")
+            super().__init__(
+                options=options,
+                version_main=driver.version,
+                driver_executable_path=os.path.abspath(driver.path),
+                browser_executable_path=driver.chrome,
+                user_data_dir=os.path.abspath(self.profile_folder),
+            )
+            self.debugger_address = self.options.debugger_address
+        self.launch_duration = time.perf_counter() - start
 
         self.set_page_load_timeout(page_load_timeout)
+        self._page_load_timeout = page_load_timeout
         self._wait_elt_timeout = wait_elt_timeout
         self._driver_wait = WebDriverWait(self, wait_elt_timeout)
 
+    def _attach(self, address, driver_path):
+        """a background tab of the running Chrome, its cookies are live"""
+        self.browser_pid = None  # not ours to kill
+        self.debugger_address = address
+        self._detached = False
+        options = uc.ChromeOptions()
+        options.debugger_address = address
+        # skip uc.Chrome.__init__ that launches its own Chrome
+        ChromeWebDriver.__init__(self, service=Service(driver_path), options=options)
+        tab = self.execute_cdp_cmd(
+            "Target.createTarget", {"url": "about:blank", "background": True}
+        )
+        self.switch_to.window(tab["targetId"])
+        self.log("Attaché à ", Style(address).bold)
+
+    def quit(self):
+        self._stop_aside()
+        if not self.attached:
+            super().quit()
+        elif not self._detached:
+            # only close our tab & chromedriver
+            self._detached = True
+            try:
+                self.close()
+            # pylint: disable=broad-except
+            except Exception:
+                pass
+            self.service.stop()
+
     def _are_local_cookies_valid(self, domain):
-        for file in ("Default\\Cookies", "Default\\Network\\Cookies"):
-            file = os.path.join(Chrome.profile_folder, file)
+        for file in (("Default", "Cookies"), ("Default", "Network", "Cookies")):
+            file = os.path.join(self.profile_folder, *file)
             if os.path.exists(file):
                 in_2mn = time.time() + 120
                 if cookies := chrome_cookies(domain_name=domain, cookie_file=file):
@@ -80,12 +179,14 @@ class Chrome(uc.Chrome):
             self.execute_cdp_cmd("Network.setCookie", cookie)
         self.execute_cdp_cmd("Network.disable", {})
 
-        if expires := (cookie.expires for cookie in cookies):
+        if expires := [cookie.expires for cookie in cookies if cookie.expires]:
             expire = datetime.now() - datetime.fromtimestamp(min(expires))
             self.log("expirent dans ", Style(timedelta_loc(expire)).bold)
 
     def load_cookies(self, url):
-        domain = urlparse(url).netloc
+        if self.attached:
+            return
+        domain = urlparse(url).hostname
         # do local profile cookies are valid ?
         if not self._are_local_cookies_valid(domain):
             # preload cookies from the regular Chrome profile
@@ -104,6 +205,70 @@ class Chrome(uc.Chrome):
     def wait_for_clickable(self, xpath, timeout=None):
         return self.wait_for(xpath, EC.element_to_be_clickable, timeout)
 
+    def fetch(self, url):
+        """
+        the html of url fetched in the current page with its cookies,
+        no rendering nor wait, None if it failed
+        """
+        try:
+            return self.execute_script(Chrome.fetch_js, url)
+        except WebDriverException:
+            return None
+
+    def _start_aside(self):
+        if self._aside_loop is None:
+            self._aside_loop = asyncio.new_event_loop()
+            self._aside_thread = Thread(
+                target=self._aside_loop.run_forever, daemon=True
+            )
+            self._aside_thread.start()
+        return self._aside_loop
+
+    async def _load_htmls(self, urls):
+        try:
+            if self._cdp is None:
+                self._cdp = await CDP(self.debugger_address).__aenter__()
+            return await asyncio.gather(
+                *(load_html(self._cdp, url, self._page_load_timeout) for url in urls)
+            )
+        except Exception:
+            await self._close_cdp()  # reconnected by the next load
+            raise
+
+    async def _close_cdp(self):
+        if cdp := self._cdp:
+            self._cdp = None
+            try:
+                await cdp.__aexit__(None, None, None)
+            # pylint: disable=broad-except
+            except Exception:
+                pass
+
+    async def _close_aside(self, loop):
+        await self._close_cdp()
+        await loop.shutdown_default_executor()  # of asyncio.to_thread
+
+    def _stop_aside(self):
+        if loop := self._aside_loop:
+            self._aside_loop = None
+            close = asyncio.run_coroutine_threadsafe(self._close_aside(loop), loop)
+            try:
+                close.result(self._page_load_timeout)
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+                self._aside_thread.join()
+                loop.close()
+
+    def load_aside(self, *urls):
+        """
+        Future of the htmls of urls loaded together in other tabs over CDP,
+        while this one keeps driving, the tabs share the cookies, a single
+        asyncio loop & CDP connection per Chrome, stopped when it quits
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._load_htmls(urls), self._start_aside()
+        )
+
     def xpath(self, xpath):
         return _find(self.find_element, xpath)
 
@@ -118,29 +283,17 @@ class Chrome(uc.Chrome):
                 file=os.path.split(exc_tb.tb_frame.f_code.co_filename)[1],
                 line=exc_tb.tb_lineno,
             )
-            self._save_error(traceback.format_exc(), datetime.now())
+            self._save_error(exc_type.__name__, traceback.format_exc())
         self.quit()
         return True
 
-    def _save_error(self, error_log, error_date):
-        # remove all previous errors folders
-        if os.path.exists(Chrome.error_folder):
-            for filename in os.listdir(Chrome.error_folder):
-                file_path = os.path.join(Chrome.error_folder, filename)
-                if os.path.isdir(file_path):
-                    shutil.rmtree(file_path)
-
-        # write the errors files
-        folder = os.path.join(Chrome.error_folder, f"{error_date:%Y_%m_%d_at_%H_%M_%S}")
-        os.makedirs(folder, exist_ok=True)
-        filename = os.path.join(folder, Chrome.error_folder)
+    def _save_error(self, name, error_log):
+        if not self.archive:
+            print(error_log)
+            return
         try:
-            with open(f"{filename}.html", "w", encoding="utf8") as f:
-                f.write(self.page_source)
-
-            with open(f"{filename}.txt", "w", encoding="utf8") as f:
-                f.write(error_log)
-
+            page, url = self.page_source, self.current_url
         # pylint: disable=broad-except
-        except Exception as err:
-            print(f"can't save error page : {err}")
+        except Exception:
+            page, url = None, ""
+        self.archive.add(page, url, error=name, trace=error_log)
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+
+class Clock:
+    """real time"""
+
+    def __init__(self, tick=1):
+        """tick: the seconds between wake-ups, eg for the countdown"""
+        self.tick = tick
+
+    @staticmethod
+    def now():
+        return datetime.now()
+
+    def wait(self, event, left):
+        return event.wait(min(left, self.tick))
+
+
+class VirtualClock(Clock):
+    """simulated time, waiting jumps straight to the end of the wait"""
+
+    def __init__(self, start=None):
+        super().__init__()
+        self._now = start or datetime.now()
+
+    def now(self):
+        return self._now
+
+    def advance(self, seconds):
+        self._now += timedelta(seconds=seconds)
+
+    def wait(self, event, left):
+        if not event.is_set():
+            self.advance(max(left, 0))
+        return event.is_set()
@@ -1,5 +1,7 @@
 from types import SimpleNamespace
 
+import yaml
+
 from .loader import Loader, YamlLoader
 
 
@@ -25,23 +27,87 @@ class Config(SimpleNamespace, YamlLoader):
     )
 
 
+def _check(new, old, path=""):
+    """
+    new config needs the same keys & types than the old one, but in
+    a mapping with a default entry, whose keys are free & checked against it
+    """
+    keyed = hasattr(old, "default")
+    if keyed and not hasattr(new, "default"):
+        raise ValueError(f"{path}default manquant")
+    if not keyed and vars(new).keys() != vars(old).keys():
+        raise ValueError(f"clés de {path or 'config'} modifiées")
+
+    for key, value in vars(new).items():
+        old_value = old.default if keyed else getattr(old, key)
+        name = f"{path}{key}"
+        if isinstance(old_value, Config):
+            if not isinstance(value, Config):
+                raise ValueError(f"{name} doit être un dictionnaire")
+            _check(value, old_value, f"{name}.")
+        elif not isinstance(value, type(old_value)) and not (
+            isinstance(value, (int, float)) and isinstance(old_value, (int, float))
+        ):
+            raise ValueError(f"{name} doit être de type {type(old_value).__name__}")
+
+
 class LoaderConfig:
     """behave like a Config object that's loaded at init and can be saved"""
 
-    def __init__(self, filename):
+    def __init__(self, filename, config=None):
+        """config: already loaded Config, eg sent by another process"""
         self._loader = Loader(filename)
-        self._config = self._loader.load()
+        self._config = config or self._loader.load()
+        self._mtime = self._loader.mtime()
 
     def __getattr__(self, name):
         return getattr(self._config, name)
 
     def __setattr__(self, name, value):
-        if name in ("_loader", "_config"):
+        if name in ("_loader", "_config", "_mtime"):
             super().__setattr__(name, value)
         elif hasattr(self._config, name):
             setattr(self._config, name, value)
         else:
             raise AttributeError
 
+    @property
+    def filename(self):
+        return self._loader.filename
+
+    def snapshot(self):
+        """the picklable Config"""
+        return self._config
+
     def save(self):
         self._loader.save(self._config)
+        # not a change to reload
+        self._mtime = self._loader.mtime()
+
+    def restore(self, config):
+        """back to a snapshot, the file is reloaded once modified again"""
+        self._config = config
+
+    def reload(self):
+        """
+        reload the config when its file has been modified,
+        returns the set of the changed top level keys
+        """
+        if (mtime := self._loader.mtime()) == self._mtime:
+            return set()
+
+        self._mtime = mtime
+        try:
+            config = self._loader.load()
+        except yaml.YAMLError as err:
+            mark = getattr(err, "problem_mark", None)
+            line = f" ligne {mark.line + 1}" if mark else ""
+            raise ValueError(f"yaml invalide{line}") from err
+        if not isinstance(config, Config):
+            raise ValueError("pas de !Config")
+        _check(config, self._config)
+
+        old, self._config = self._config, config
+        return {
+            key for key, value in vars(config).items() if getattr(old, key) != value
+        }
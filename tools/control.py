@@ -0,0 +1,102 @@
+import hmac
+import json
+import math
+import threading
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+HOST = "127.0.0.1"
+TOKEN_HEADER = "X-Control-Token"
+
+
+def _jsonable(obj):
+    """obj with only strict json values, no NaN nor Infinity"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if obj is None or isinstance(obj, (str, int)):
+        return obj
+    if isinstance(obj, datetime):
+        return obj.isoformat(timespec="seconds")
+    if isinstance(obj, dict):
+        return {key: _jsonable(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple, set, deque)):
+        return [_jsonable(value) for value in obj]
+    if hasattr(obj, "__dict__"):
+        return _jsonable(vars(obj))
+    return str(obj)
+
+
+def to_json(obj):
+    return json.dumps(_jsonable(obj), ensure_ascii=False, allow_nan=False)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "Control/1.0"
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    def _send(self, code, obj):
+        body = to_json(obj).encode("utf8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _allowed(self):
+        """
+        only from a local client that knows the token, a browser request
+        carries an Origin or a foreign Host (DNS rebinding)
+        """
+        if self.headers.get("Origin") is not None:
+            return False
+        if self.headers.get("Host") not in self.server.hosts:
+            return False
+        token = self.headers.get(TOKEN_HEADER, "")
+        return hmac.compare_digest(token.encode(), self.server.token.encode())
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        if not self._allowed():
+            return self._send(403, dict(error="refusé"))
+        if urlparse(self.path).path.strip("/") in ("", "status"):
+            return self._send(200, self.server.status())
+        return self._send(404, dict(error="inconnu"))
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        if not self._allowed():
+            return self._send(403, dict(error="refusé"))
+        name = urlparse(self.path).path.strip("/")
+        if command := self.server.commands.get(name):
+            command()
+            return self._send(200, dict(ok=True, command=name))
+        return self._send(404, dict(error=f"commande inconnue: {name}"))
+
+
+class ControlServer(ThreadingHTTPServer):
+    """
+    localhost JSON control of a running app, every request needs the token
+    in the X-Control-Token header:
+    GET /status returns status(), POST /<name> calls commands[name]()
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port, token, status, commands):
+        if not token:
+            raise ValueError("pas de token")
+        super().__init__((HOST, port), _Handler)
+        self.token = token
+        self.hosts = {f"{host}:{port}" for host in (HOST, "localhost")}
+        self.status = status
+        self.commands = commands
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
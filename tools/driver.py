@@ -0,0 +1,89 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass
+
+import undetected_chromedriver as uc
+
+from .loader import Loader, YamlMapping
+
+if sys.platform == "win32":
+    from win32api import HIWORD, GetFileVersionInfo
+
+_lock = threading.Lock()
+
+
+def chrome_main_version(filename):
+    if sys.platform == "win32":
+        info = GetFileVersionInfo(filename, "\\")
+        return HIWORD(info["FileVersionMS"])
+
+    # eg "Google Chrome 120.0.6099.109"
+    out = subprocess.run(
+        [filename, "--version"], capture_output=True, text=True, check=True
+    ).stdout
+    if match := re.search(r"(\d+)\.\d+", out):
+        return int(match.group(1))
+    raise ValueError(f"unknown Chrome version: {out!r}")
+
+
+@dataclass
+class Driver(YamlMapping):
+    chrome: str = ""
+    chrome_mtime: int = 0
+    version: int = 0
+    path: str = ""
+
+
+class DriverCache:
+    """
+    a patched chromedriver per Chrome main version kept in folder,
+    the Chrome version is detected again only when its binary has changed,
+    a chromedriver_<version> already in folder is used as is (offline)
+    """
+
+    exe = ".exe" if sys.platform == "win32" else ""
+
+    def __init__(self, folder="drivers"):
+        self.folder = folder
+        self.loader = Loader(os.path.join(folder, "driver.yaml"))
+
+    def _driver_path(self, version):
+        return os.path.join(self.folder, f"chromedriver_{version}{DriverCache.exe}")
+
+    def _provision(self, version):
+        path = self._driver_path(version)
+        if not os.path.exists(path):
+            # download & patch in uc data folder, then keep it
+            patcher = uc.Patcher(version_main=version)
+            patcher.auto()
+            shutil.copy(patcher.executable_path, path)
+
+        # remove the drivers of the other versions
+        keep = os.path.basename(path)
+        for filename in os.listdir(self.folder):
+            if filename.startswith("chromedriver_") and filename != keep:
+                os.remove(os.path.join(self.folder, filename))
+        return path
+
+    def get(self):
+        """the Driver of the current Chrome"""
+        chrome = uc.find_chrome_executable()
+        mtime = os.stat(chrome).st_mtime_ns
+        with _lock:
+            driver = self.loader.load()
+            if (
+                driver
+                and (driver.chrome, driver.chrome_mtime) == (chrome, mtime)
+                and os.path.exists(driver.path)
+            ):
+                return driver
+
+            os.makedirs(self.folder, exist_ok=True)
+            version = chrome_main_version(chrome)
+            driver = Driver(chrome, mtime, version, self._provision(version))
+            self.loader.save(driver)
+            return driver
@@ -0,0 +1,127 @@
+import csv
+import json
+import math
+import os
+from datetime import datetime
+
+import numpy as np
+from numpy.lib import format as npy
+
+
+def _iso(value):
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    return value
+
+
+def _json_value(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None  # no NaN nor Infinity in strict json
+    return _iso(value)
+
+
+class CsvWriter:
+    """rows appended to a csv file with a header line"""
+
+    def __init__(self, filename, columns, append=False):
+        new = not (append and os.path.exists(filename))
+        self._file = open(filename, "w" if new else "a", encoding="utf8", newline="")
+        self._csv = csv.writer(self._file)
+        if new:
+            self._csv.writerow(name for name, _ in columns)
+
+    def write(self, rows):
+        self._csv.writerows(map(_iso, row) for row in rows)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlWriter:
+    """a json object per row"""
+
+    def __init__(self, filename, columns, append=False):
+        self._names = [name for name, _ in columns]
+        self._file = open(filename, "a" if append else "w", encoding="utf8")
+
+    def write(self, rows):
+        self._file.writelines(
+            f"{json.dumps(dict(zip(self._names, map(_json_value, row))))}\n"
+            for row in rows
+        )
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class NpyWriter:
+    """
+    columnar, a <column>.npy per column in a folder, appended in place:
+    the numpy header keeps room for the growing length
+    """
+
+    def __init__(self, folder, columns, append=False):
+        os.makedirs(folder, exist_ok=True)
+        self._columns = []  # [(file, dtype)]
+        self.length = 0
+        for name, dtype in columns:
+            filename = os.path.join(folder, f"{name}.npy")
+            dtype = np.dtype(dtype)
+            if append and os.path.exists(filename):
+                f = open(filename, "r+b")
+                npy.read_magic(f)
+                (length,), _, _ = npy.read_array_header_1_0(f)
+                self.length = length
+            else:
+                f = open(filename, "w+b")
+                self._write_header(f, dtype, 0)
+            # drop what's beyond a header not flushed
+            f.seek(f.tell() + self.length * dtype.itemsize)
+            f.truncate()
+            self._columns.append((f, dtype))
+
+    @staticmethod
+    def _write_header(f, dtype, length):
+        f.seek(0)
+        header = dict(
+            descr=npy.dtype_to_descr(dtype), fortran_order=False, shape=(length,)
+        )
+        npy.write_array_header_1_0(f, header)
+
+    def write(self, rows):
+        for values, (f, dtype) in zip(zip(*rows), self._columns):
+            np.array(values, dtype=dtype).tofile(f)
+        self.length += len(rows)
+
+    def flush(self):
+        for f, dtype in self._columns:
+            end = f.tell()
+            self._write_header(f, dtype, self.length)
+            f.seek(end)
+            f.flush()
+
+    def close(self):
+        self.flush()
+        for f, _ in self._columns:
+            f.close()
+
+
+WRITERS = dict(csv=CsvWriter, jsonl=JsonlWriter, npy=NpyWriter)
+
+
+def chunks(rows, size):
+    """lists of at most size rows"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -41,6 +41,11 @@ class Loader:
     def __init__(self, filename):
         self.filename = filename
 
+    def mtime(self):
+        if os.path.exists(self.filename):
+            return os.stat(self.filename).st_mtime_ns
+        return None
+
     def load(self):
         if os.path.exists(self.filename):
             with open(self.filename, "r", encoding="utf8") as f:
@@ -0,0 +1,117 @@
+import os
+import shutil
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+MB = 2**20
+
+
+def _files(folder):
+    for root, _, files in os.walk(folder):
+        for filename in files:
+            path = os.path.join(root, filename)
+            yield path, os.path.relpath(path, folder)
+
+
+def _size(folder):
+    size = 0
+    for path, _ in _files(folder):
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            pass
+    return size
+
+
+class Profile:
+    """
+    bounded Chrome profile: above max_mb, everything but the cookies and
+    the Local State holding their encryption key is purged, the caches are
+    purged on their own every purge_caches_every_hours
+    """
+
+    keep = (
+        "Local State",
+        os.path.join("Default", "Cookies"),
+        os.path.join("Default", "Network", "Cookies"),
+    )
+    caches = (
+        os.path.join("Default", "Cache"),
+        os.path.join("Default", "Code Cache"),
+        os.path.join("Default", "GPUCache"),
+        os.path.join("Default", "Service Worker", "CacheStorage"),
+        "GrShaderCache",
+        "ShaderCache",
+    )
+
+    def __init__(
+        self, folder, max_mb=200, check_every_hours=6, purge_caches_every_hours=24
+    ):
+        self.folder = None
+        self.set(folder, max_mb, check_every_hours, purge_caches_every_hours)
+
+    def set(self, folder, max_mb, check_every_hours, purge_caches_every_hours):
+        """the next checks are kept, unless the folder changed"""
+        if folder != self.folder:
+            self._next_check = self._next_purge = None
+        self.folder = folder
+        self.max_size = max_mb * MB
+        self.check_every = timedelta(hours=check_every_hours)
+        self.purge_every = timedelta(hours=purge_caches_every_hours)
+
+    def _is_kept(self, relpath):
+        # with the sqlite -journal & -wal files
+        return any(relpath == k or relpath.startswith(f"{k}-") for k in Profile.keep)
+
+    def size(self):
+        return _size(self.folder)
+
+    def compact(self):
+        """returns the new size"""
+        for path, relpath in list(_files(self.folder)):
+            if not self._is_kept(relpath):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        # remove the emptied folders
+        for root, folders, _ in os.walk(self.folder, topdown=False):
+            for folder in folders:
+                path = os.path.join(root, folder)
+                if not os.listdir(path):
+                    os.rmdir(path)
+        return self.size()
+
+    def purge_caches(self):
+        """returns the freed size"""
+        freed = 0
+        for cache in Profile.caches:
+            path = os.path.join(self.folder, cache)
+            if os.path.isdir(path):
+                freed += _size(path)
+                shutil.rmtree(path, ignore_errors=True)
+        return freed
+
+    def maintain(self, now=None):
+        """
+        meant to be called when Chrome is not running, checks the size
+        every check_every hours and compacts if needed, purges the caches
+        every purge_every hours, returns None if none done or
+        SimpleNamespace(size, compacted_size, purged_size)
+        """
+        now = now or datetime.now()
+        check = not self._next_check or now >= self._next_check
+        purge = self.purge_every and (not self._next_purge or now >= self._next_purge)
+        if not (check or purge):
+            return None
+        if check:
+            self._next_check = now + self.check_every
+        if purge:
+            self._next_purge = now + self.purge_every
+
+        if not os.path.isdir(self.folder):
+            return None
+        purged = self.purge_caches() if purge else None
+        size = self.size()
+        compacted = self.compact() if check and size > self.max_size else None
+        return SimpleNamespace(size=size, compacted_size=compacted, purged_size=purged)
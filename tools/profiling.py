@@ -0,0 +1,80 @@
+import cProfile
+import os
+import time
+import tracemalloc
+from datetime import datetime
+from functools import wraps
+
+
+class Profiler:
+    """
+    cProfile and/or tracemalloc around wrapped funcs,
+    the stats files are rotated in folder
+    """
+
+    def __init__(self, folder="profiling", keep=20, cprofile=True, memory=False):
+        self.folder = folder
+        self.keep = keep
+        self.cprofile = cprofile
+        self.memory = memory
+        self.saved = None  # path of the last stats, without extension
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def wrap(self, name, func, slow_ms=None, on_slow=None):
+        """
+        stats are saved only for the calls slower than slow_ms, always if None,
+        on_slow(name, seconds) is called for those slow calls
+        """
+
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            profile = cProfile.Profile() if self.cprofile else None
+            if self.memory:
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            if profile:
+                profile.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if profile:
+                    profile.disable()
+                duration = time.perf_counter() - start
+                if slow_ms is None or duration * 1000 >= slow_ms:
+                    self._save(name, duration, profile)
+                    if on_slow and slow_ms is not None:
+                        on_slow(name, duration)
+
+        return wrapped
+
+    def _save(self, name, duration, profile):
+        os.makedirs(self.folder, exist_ok=True)
+        filename = f"{datetime.now():%Y_%m_%d_at_%H_%M_%S_%f}_{name}"
+        filename = self.saved = os.path.join(self.folder, filename)
+        if profile:
+            profile.dump_stats(f"{filename}.prof")
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            stats = tracemalloc.take_snapshot().statistics("lineno")[:20]
+            with open(f"{filename}.txt", "w", encoding="utf8") as f:
+                f.write(f"{name} in {duration:.3f}s\n")
+                f.write(
+                    f"memory {current / 2**20:.1f}MB, peak {peak / 2**20:.1f}MB\n\n"
+                )
+                f.write("\n".join(map(str, stats)))
+        self._rotate()
+
+    def _rotate(self):
+        """keep the last stats, .prof & .txt of a call share their name"""
+        names = sorted({os.path.splitext(f)[0] for f in os.listdir(self.folder)})
+        old = set(names[: -self.keep])
+        for filename in os.listdir(self.folder):
+            if os.path.splitext(filename)[0] in old:
+                os.remove(os.path.join(self.folder, filename))
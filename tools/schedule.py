@@ -1,42 +1,79 @@
+import heapq
 import random
 import threading
 from datetime import datetime, timedelta
+from itertools import islice, repeat
+from operator import itemgetter
 from types import SimpleNamespace
 
 from . import timedelta_loc
+from .clock import Clock
 
 
 class Duration:
     time_units = "days", "hours", "minutes", "seconds"
 
-    def __init__(self, duration=0):
+    def __init__(self, duration=0, rnd=None):
+        self._rnd = rnd or random
         self._duration = duration
         self._jitter = timedelta()
         self._jitter_range = 0, 0
         self._at_hour = None
         self._date = None
+        self._sampler = None
 
-    def from_now(self, now=None):
+    def _first(self, now):
+        """first date without jitter that's possible from now"""
         assert isinstance(self._duration, timedelta), "need a duration unit"
         assert isinstance(self._jitter, timedelta), "need a jitter unit"
         assert self._duration > timedelta(), "duration has to be > 0"
         assert self._jitter >= timedelta(), "duration has to be >= 0"
 
-        now = now or datetime.now()
         if self._at_hour:
-            self._date = datetime.combine(now, self._at_hour.time())
+            date = datetime.combine(now, self._at_hour.time())
         else:
-            self._date = now + self._duration
+            date = now + self._duration
 
         # date possible with min jitter needs to be >= now
         min_jitter = self._jitter * min(self._jitter_range)
-        while self._date + min_jitter < now:
-            self._date += self._duration
+        if (late := now - (date + min_jitter)) > timedelta():
+            date += self._duration * -(-late // self._duration)  # ceil
+        return date
 
-        # add rnd jitter
-        self._date += self._jitter * random.uniform(*self._jitter_range)
+    def from_now(self, now=None):
+        now = now or datetime.now()
+        first = self._first(now)
+        if self._sampler:
+            min_, max_ = (self._jitter * v for v in self._jitter_range)
+            self._date = self._sampler(first + min_, first + max_, self._rnd)
+        else:
+            # add rnd jitter
+            jitter = self._jitter * self._rnd.uniform(*self._jitter_range)
+            self._date = first + jitter
         return self
 
+    def next_from(self, now):
+        """keep the date if still to come"""
+        if self._date and self._date > now:
+            return self
+        return self.from_now(now)
+
+    def windows(self, now=None):
+        """
+        endless (start, end) jitter windows of the next occurences,
+        from the one in progress if any
+        """
+        now = now or datetime.now()
+        date = self._first(now)
+        min_, max_ = (self._jitter * v for v in self._jitter_range)
+        if self._at_hour:
+            # started but not over, at most jitter / duration steps back
+            while date - self._duration + max_ > now:
+                date -= self._duration
+        while True:
+            yield date + min_, date + max_
+            date += self._duration
+
     @property
     def date(self):
         return self._date
@@ -64,6 +101,11 @@ class Duration:
     def jitter_add(self, jitter):
         return self.jitter(jitter, add=True)
 
+    def sample_with(self, sampler):
+        """sampler(start, end, rnd) picks the date in the jitter window"""
+        self._sampler = sampler
+        return self
+
     @property
     def percent(self):
         assert not isinstance(self._jitter, timedelta), "need a jitter value"
@@ -106,16 +148,25 @@ class Schedule:
 
     log_funcs = "update", "left", "next"
 
-    def __init__(self, job, **logs):
+    def __init__(self, job, clock=None, rnd=None, **logs):
         """
         job : might return a Duration object to schedule its next call
+        clock : Clock by default, VirtualClock for simulation
+        rnd : random.Random for a seeded jitter
         """
+        self._clock = clock or Clock()
+        self._rnd = rnd
         self._run = threading.Thread(target=self._loop)
         self._force_update = threading.Event()
         self._running = False
+        self._paused = False
         self._next_in = None
+        self._retry = None
         self._everys = []
+        self._idles = []
+        self._before = None
         self._job = job
+        self.wakeups = 0  # of the schedule thread, to measure the idle cost
         logs = {name: logs.get(name, lambda _: None) for name in Schedule.log_funcs}
         self._log = SimpleNamespace(**logs)
 
@@ -132,23 +183,101 @@ class Schedule:
     def force_update(self):
         self._force_update.set()
 
+    def pause(self):
+        """skip the scheduled jobs, a forced update still runs"""
+        self._paused = True
+
+    def resume(self):
+        self._paused = False
+
+    @property
+    def paused(self):
+        return self._paused
+
+    @property
+    def tick(self):
+        """seconds between the wake-ups, ie the countdown & idle funcs period"""
+        return self._clock.tick
+
+    @tick.setter
+    def tick(self, seconds):
+        self._clock.tick = seconds
+
+    @property
+    def next_date(self):
+        return self._next_in.date if self._next_in else None
+
     def every(self, duration):
-        every = Duration(duration)
+        every = Duration(duration, rnd=self._rnd)
         self._everys.append(every)
         return every
 
+    def remove(self, every):
+        self._everys.remove(every)
+
+    def idle(self, func):
+        """func is called in the schedule thread every tick when not running job"""
+        self._idles.append(func)
+
+    def before(self, seconds, func=None, cancel=None):
+        """
+        func is called in the schedule thread seconds before a scheduled job,
+        cancel when that job won't run (paused or rescheduled), 0 seconds to remove
+        """
+        if seconds:
+            self._before = SimpleNamespace(
+                seconds=seconds, func=func, cancel=cancel, date=None
+            )
+        else:
+            self._before = None
+
+    def _check_before(self, left):
+        if not (before := self._before):
+            return
+        date = self._next_in.date
+        if before.date and before.date != date:
+            before.date = None
+            before.cancel()
+        if not before.date and not self._paused and left <= before.seconds:
+            before.date = date
+            before.func()
+
+    def rearm(self):
+        """
+        to be called in the schedule thread (ie in an idle func) when the everys
+        have changed, the current countdowns of the kept everys & retry are kept
+        """
+        now = self._clock.now()
+        nexts = [n.next_from(now) for n in self._everys]
+        if self._retry:
+            nexts.append(self._retry)
+        if not nexts:
+            raise ValueError("Nothing has been scheduled")
+
+        self._next_in = min(nexts, key=lambda n: n.date)
+        self._log.next(self._next_in.date)
+
+    def plan(self, n, now=None):
+        """the n next (start, end, every) windows of all the everys"""
+        now = now or self._clock.now()
+        windows = (zip(every.windows(now), repeat(every)) for every in self._everys)
+        windows = heapq.merge(*windows, key=itemgetter(0))
+        return [(start, end, every) for (start, end), every in islice(windows, n)]
+
     def _tick(self):
-        left = self._next_in.left()
+        left = self._next_in.left(self._clock.now())
         self._log.left(max(0, left))
-        return left <= 0
+        return left
 
     def _resume_from_now(self, next_in=None, right_now=False):
         if self._everys or next_in:
-            now = datetime.now()
-            nexts = self._everys + ([next_in] if next_in else [])
-            nexts = [n.from_now(now) for n in nexts]
-            nexts.sort(key=lambda n: n.left(now))
-            self._next_in = nexts[0]
+            now = self._clock.now()
+            # only the passed everys need a new date
+            nexts = [n.next_from(now) for n in self._everys]
+            if next_in:
+                nexts.append(next_in.from_now(now))
+            self._next_in = min(nexts, key=lambda n: n.date)
+            self._retry = next_in
 
             if right_now:
                 self.force_update()
@@ -158,12 +287,36 @@ class Schedule:
         else:
             raise ValueError("Nothing has been scheduled")
 
+    def _step(self):
+        self.wakeups += 1
+        for idle in self._idles:
+            idle()
+        # actual sleep happens in the wait()
+        left = self._tick()
+        self._check_before(left)
+        if left <= 0 or self._clock.wait(self._force_update, left):
+            if self._running:  # faster exit
+                scheduled = not self._force_update.is_set()
+                if scheduled and self._paused:
+                    # skipped, a pending retry is dropped
+                    self._retry = None
+                    self.rearm()
+                    return
+                self._log.update(scheduled)
+                if self._before:
+                    # whatever was prewarmed is used by the job
+                    self._before.date = None
+                next_in = self._job()
+                self._resume_from_now(next_in)
+
     def _loop(self):
         while self._running:
-            # actual sleep happens in the wait()
-            if self._tick() or self._force_update.wait(1):
-                if self._running:  # faster exit
-                    scheduled = not self._force_update.is_set()
-                    self._log.update(scheduled)
-                    next_in = self._job()
-                    self._resume_from_now(next_in)
+            self._step()
+
+    def run_until(self, date, right_now=False):
+        """run in the current thread till date, meant for a VirtualClock"""
+        self._resume_from_now(right_now=right_now)
+        self._running = True
+        while self._running and self._clock.now() < date:
+            self._step()
+        self._running = False
@@ -22,10 +22,20 @@ class Style(str):
         """str + Style"""
         return self(txt + str(self))
 
+    def __reduce__(self):
+        """picklable to be sent to another process"""
+        return Style._unpickle, (str(self), self._styles, self._color, self._dsize)
+
+    @staticmethod
+    def _unpickle(txt, styles, color, dsize):
+        txt = Style(txt)
+        txt._styles, txt._color, txt._dsize = styles, color, dsize
+        return txt
+
     def __getattribute__(self, name):
         attr = super().__getattribute__(name)
-        # is it a str method ?
-        if name in dir(str):
+        # is it a str method ? (not a dunder one, pickle needs them untouched)
+        if name in dir(str) and not name.startswith("__"):
 
             def method(*args, **kwargs):
                 """keep str methods returned values self style"""
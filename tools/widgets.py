@@ -172,6 +172,7 @@ class MLineAutoSize(sg.Frame):
         expand_x=True,
         expand_y=True,
     )
+    _justify = dict(l="left", c="center", r="right")
 
     def __init__(self, *args, pad=0, colors=None, **kwargs):
         kwargs.update(MLineAutoSize._kwargs)
@@ -184,15 +185,50 @@ class MLineAutoSize(sg.Frame):
             expand_x=True,
             expand_y=True,
         )
-
-    def _print_row(self, row):
-        w_row, h_row = 0, 0
+        self._rows = {}  # key: (styled row, width, height)
+        self._fonts = {}
+        self._tags = set()
+        self._size = None
+
+    def _font(self, font):
+        if font not in self._fonts:
+            self._fonts[font] = tkinter.font.Font(self.ParentForm.TKroot, font)
+        return self._fonts[font]
+
+    def _tag(self, font, color):
+        tag = f"{font}|{color}"
+        if tag not in self._tags:
+            justify = MLineAutoSize._justify.get(self.mline.Justification[0], "left")
+            self.mline.widget.tag_configure(
+                tag, font=font, foreground=color, justify=justify
+            )
+            self._tags.add(tag)
+        return tag
+
+    def _styled(self, row):
+        styled = []
         for txt in row:
-            font = self.mline.print_style(txt, end="")
-            wfont = tkinter.font.Font(self.ParentForm.TKroot, font)
+            font, color = _from_style(self.mline, txt)
+            styled.append((str(txt), font, self.mline.colors.get(color, color)))
+        return tuple(styled)
+
+    def _print_row(self, line, styled):
+        """replace the content of the line, returns its size"""
+        widget = self.mline.widget
+        widget.delete(f"{line}.0", f"{line}.end")
+        w_row, h_row = 0, 0
+        for txt, font, color in styled:
+            tag = self._tag(font, color)
+            widget.insert(f"{line}.end", txt, tag)
+            wfont = self._font(font)
             w_row += wfont.measure(txt)
             h_row = max(h_row, wfont.metrics("linespace"))
 
+        # the line end has the last font for an empty line to get its height
+        end = f"{line}.end", f"{line}.end +1c"
+        for old_tag in widget.tag_names(end[0]):
+            widget.tag_remove(old_tag, *end)
+        widget.tag_add(tag, *end)
         return w_row, h_row
 
     def _resize(self, width, height):
@@ -202,33 +238,32 @@ class MLineAutoSize(sg.Frame):
         widget.pack_propagate(0)
         widget.config(width=width + padx, height=height + pady)
 
-    @staticmethod
-    def _get_rows(txts):
-        row = []
-        for txt in txts:
-            if txt:= txt.splitlines(True):
-                row.append(txt[0])
-                if txt[0] == "\n" or len(txt) > 1:
-                    yield row
-                    row = txt[1:]
-
-        if row:
-            yield row
-
-    def update(self, *txts):
-        self.mline("")
-
-        row = None
-        width, height = 0, 0
-        for row in self._get_rows(txts):
-            w_row, h_row = self._print_row(row)
-            width = max(width, w_row)
-            height += h_row
-
-        if row and row[-1] == "\n":
-            height += h_row
-
-        self._resize(width, height)
+    def update(self, rows):
+        """
+        rows: {key: (Style, ...)}, one line per key, only the changed rows
+        are printed, returns True if it has been resized
+        """
+        widget = self.mline.widget
+        widget.configure(state="normal")
+        if list(rows) != list(self._rows):
+            # new layout
+            widget.delete("1.0", "end")
+            widget.insert("1.0", "\n" * (len(rows) - 1))
+            self._rows = dict.fromkeys(rows)
+
+        for line, (key, row) in enumerate(rows.items(), 1):
+            styled = self._styled(row)
+            if not self._rows[key] or self._rows[key][0] != styled:
+                self._rows[key] = styled, *self._print_row(line, styled)
+        widget.configure(state="disabled")
+
+        width = max(width for _, width, _ in self._rows.values())
+        height = sum(height for _, _, height in self._rows.values())
+        if (width, height) != self._size:
+            self._size = width, height
+            self._resize(width, height)
+            return True
+        return False
 
 
 class TextColor(sg.T):
@@ -260,6 +295,10 @@ class AnimatedTxt(TextColor):
             self._animated = animated
             self._animate(args[0], **kwargs)
 
+    def suspend(self):
+        """stop the animation till the next animated update"""
+        self._animated = False
+
     def _get_anim(self):
         i = self._index % (self._length * 2)
         i = i if i <= self._length else (self._length * 2 - i)